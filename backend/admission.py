@@ -0,0 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from .config import MAX_IN_FLIGHT_REQUESTS, MAX_QUEUED_REQUESTS
+from .metrics import Gauge, register
+
+
+class AdmissionRejected(Exception):
+    """Raised when the server already has too many requests in flight and queued."""
+
+
+class AdmissionController:
+    """Caps concurrent agent runs with a semaphore plus a bounded wait queue."""
+
+    def __init__(self, max_in_flight: int, max_queued: int):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.queued >= self.max_queued:
+            raise AdmissionRejected(f"{self.in_flight} in flight, {self.queued} queued")
+
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+admission = AdmissionController(MAX_IN_FLIGHT_REQUESTS, MAX_QUEUED_REQUESTS)
+
+register(Gauge(
+    "recovery_admission_requests", "Requests currently running agents or waiting for a slot.",
+    lambda: {("in_flight",): admission.in_flight, ("queued",): admission.queued},
+    ["state"],
+))
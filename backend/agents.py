@@ -1,172 +1,521 @@
+import asyncio
+import json
 import os
-import random
-from groq import Groq
-from dotenv import load_dotenv
-from pathlib import Path
-
-# --- Setup Groq Client ---
-BASE_DIR = Path(__file__).resolve().parent.parent
-dotenv_path = BASE_DIR / '.env'
-load_dotenv(dotenv_path=dotenv_path)
-
-# Initialize Groq client
-api_key_raw = os.getenv("GROQ_API_KEY")
-if api_key_raw:
-    api_key = api_key_raw.strip('"\'')  # Remove quotes if present
-    groq_client = Groq(api_key=api_key)
-    print("✓ Groq client initialized successfully!")
-    print("✓ Using model: llama-3.1-8b-instant (Free tier)")
-else:
-    print("⚠️ GROQ_API_KEY not found, using mock mode")
-    groq_client = None
-
-# --- AGENT PROMPTS (keep same) ---
-THERAPIST_SYSTEM_PROMPT = """You are the Therapist Agent, Dr. Empathy. Your role is to provide compassionate, empathetic, and professional support to a user recovering from a painful breakup.
-Your response must be kind, validating, hopeful, and strictly under 100 words.
-Structure your response into an acknowledgement and one concrete, healthy piece of self-care advice for today.
-DO NOT talk about the other agents or give advice related to finding a new relationship."""
-
-CLOSURE_AGENT_SYSTEM_PROMPT = """You are the 'Closure Agent,' specialized in providing a cathartic emotional outlet for a user going through a breakup.
-Your single goal is to write the raw, emotional, often irrational message that the user desperately WANTS to send to their ex, but should NOT send.
-RULES:
-1. Strictly use the first person ("I"): The output must sound like it came directly from the user's deepest pain and longing.
-2. Be intensely emotional and cathartic: Focus on regret, anger, sadness, confusion, and raw longing.
-3. DO NOT provide advice, coping strategies, or support. Your entire output must be the message draft itself.
-4. Format the message clearly with a short, emotional introduction (e.g., 'A Message Draft for Emotional Release:') followed by the raw text."""
-
-ROUTINE_PLANNER_SYSTEM_PROMPT = """You are the Routine Planner Agent. Create a simple, manageable daily recovery routine for someone going through a breakup.
-Focus on:
-1. Morning: One self-reflection activity (5-10 minutes)
-2. Afternoon: One social/connection activity
-3. Evening: One healthy distraction/self-care activity
-Keep it practical, gentle, and under 80 words."""
-
-BRUTAL_HONESTY_SYSTEM_PROMPT = """You are the Brutal Honesty Agent. Provide direct, objective, no-nonsense insights about the breakup situation.
-Be factual, logical, and straightforward. Point out patterns or truths the user might be avoiding.
-Do NOT be cruel - be honest but constructive. Keep it under 80 words."""
-
-# --- Helper Functions (keep same) ---
-def fallback_therapist_response():
-    responses = [
-        "I hear the pain in your words. Remember to practice self-compassion today - you're doing the best you can.",
-        "Your feelings are completely valid. Try the box breathing technique: inhale 4s, hold 4s, exhale 4s, hold 4s.",
-        "Breakups shake our foundation. Today, focus on one small act of kindness toward yourself.",
-        "It's okay to feel overwhelmed. Consider writing down three things you're grateful for today."
-    ]
-    return random.choice(responses)
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
 
-def fallback_closure_response():
-    responses = [
-        "A Message Draft for Emotional Release: I'm writing this because I need to say it somewhere, even though I know sending it wouldn't help either of us...",
-        "A Message Draft for Emotional Release: There's this ache in my chest filled with all the words I can't say to you anymore...",
-        "A Message Draft for Emotional Release: This page holds what my phone shouldn't - every raw, unfiltered thought I need to release but shouldn't share..."
-    ]
-    return random.choice(responses)
+from .cache import cache_bypass, make_cache_key, normalize_input, response_cache
+from .config import (
+    GROQ_API_KEY, AGENT_TIMEOUT_SECONDS, PLAN_TIMEOUT_SECONDS, BATCH_MAX_CONCURRENCY, ORCHESTRATION_MODE, LLM_BACKENDS,
+    WARMUP_TIMEOUT_SECONDS,
+)
+from .hedging import hedger
+from .llm_backends import BACKEND_FAILOVERS, build_backends, llm_deadline
+from .metrics import Gauge, current_agent, record_agent, record_fallback, register
+from .preprocess import _prompt_tokens, prepare_input
+from .registry import AGENT_REGISTRY, AgentSpec, plan_summary, resolve_agents
+from .sessions import conversation_context, session_store
+from .singleflight import llm_flights, plan_flights
 
-def fallback_routine_response():
-    responses = [
-        "Morning: Write 3 things you're grateful for. Afternoon: Text one friend. Evening: Watch a comedy show for 30 minutes.",
-        "Morning: 5-minute meditation. Afternoon: Walk outside for 15 minutes. Evening: Cook a healthy meal.",
-        "Morning: Journal about one emotion. Afternoon: Call family member. Evening: Read a book chapter."
-    ]
-    return random.choice(responses)
+GROQ_MODEL = "llama-3.1-8b-instant"  # ONLY THIS MODEL WORKS
 
-def fallback_honesty_response():
-    responses = [
-        "The relationship served its purpose. Holding on to 'what ifs' prevents you from seeing new possibilities.",
-        "Focus on the patterns, not the person. What did this relationship teach you about your needs?",
-        "Romanticizing the past keeps you stuck. The incompatibilities were real and important."
-    ]
-    return random.choice(responses)
+# --- Shared Groq client (pooled, with retries and a circuit breaker) ---
+# Created on first use in each process rather than at import, so every server
+# worker gets its own connection pool and event-loop-bound state. The Groq SDK
+# is imported then too: it is most of this module's import time, and mock or
+# local-only setups never need it.
+llm_client = None
+_llm_client_pid = None
+
+def get_llm_client():
+    global llm_client, _llm_client_pid
+    if _llm_client_pid != os.getpid():
+        if GROQ_API_KEY:
+            from .llm_client import LLMClient
+            llm_client = LLMClient(api_key=GROQ_API_KEY)
+            print(f"✓ Groq client initialized successfully! (pid {os.getpid()})")
+            print(f"✓ Using model: {GROQ_MODEL} (Free tier)")
+        else:
+            print("⚠️ GROQ_API_KEY not found, using mock mode")
+            llm_client = None
+        _llm_client_pid = os.getpid()
+    return llm_client
+
+def set_llm_client(client):
+    """Replaces this process's client (benchmarks use this to plug in mocks)."""
+    global llm_client, _llm_client_pid
+    llm_client = client
+    _llm_client_pid = os.getpid()
+
+async def close_llm_client():
+    """Closes this process's connection pool and LLM backends, if they were opened."""
+    global llm_client, _llm_client_pid, llm_backends, _llm_backends_pid
+    if llm_backends is not None and _llm_backends_pid == os.getpid():
+        for backend in llm_backends:
+            await backend.aclose()
+    llm_backends = None
+    _llm_backends_pid = None
+    if llm_client is not None and _llm_client_pid == os.getpid():
+        await llm_client.aclose()
+    llm_client = None
+    _llm_client_pid = None
+
+# --- LLM backends, in routing order (see LLM_BACKENDS) ---
+llm_backends = None
+_llm_backends_pid = None
+
+def get_llm_backends() -> list:
+    global llm_backends, _llm_backends_pid
+    if _llm_backends_pid != os.getpid():
+        llm_backends = build_backends(LLM_BACKENDS, get_llm_client, GROQ_MODEL)
+        print(f"✓ LLM backends: {' -> '.join(backend.name for backend in llm_backends) or 'none'}")
+        _llm_backends_pid = os.getpid()
+    return llm_backends
+
+def set_llm_backends(backends: list):
+    """Replaces this process's backend routing (benchmarks use this to compare backends)."""
+    global llm_backends, _llm_backends_pid
+    llm_backends = backends
+    _llm_backends_pid = os.getpid()
+
+async def warm_up(prime: bool = False) -> dict:
+    """Builds this process's LLM client and backends ahead of the first request.
+
+    With prime=True the first available backend also answers a one-token
+    prompt, so its connection is open (and TLS done) before users arrive.
+    A failed prime is reported, not raised: requests still fall back as usual.
+    """
+    started = time.perf_counter()
+    backends = [backend for backend in get_llm_backends() if backend.available()]
+    # Fill the per-agent prompt token counts the input budget uses (without counting a fake input)
+    for spec in AGENT_REGISTRY.values():
+        _prompt_tokens(spec.system_prompt)
+    primed = None
+    if prime and backends:
+        agent_token = current_agent.set("warmup")
+        try:
+            text = await asyncio.wait_for(
+                backends[0].complete("Reply with OK.", "ping", temperature=0, max_tokens=1),
+                timeout=WARMUP_TIMEOUT_SECONDS,
+            )
+            primed = bool(text)
+        except Exception as e:
+            print(f"⚠️ Warmup request to {backends[0].name} failed: {type(e).__name__}: {e}")
+            primed = False
+        finally:
+            current_agent.reset(agent_token)
+    seconds = time.perf_counter() - started
+    print(f"✓ Warmed up in {seconds * 1000:.0f}ms (pid {os.getpid()}"
+          f"{', primed ' + backends[0].name if primed else ''})")
+    return {"backends": [backend.name for backend in backends], "primed": primed, "seconds": round(seconds, 3)}
+
+register(Gauge(
+    "recovery_llm_client_events", "LLM client counters (calls, retries, failures, short-circuits).",
+    lambda: {(k,): v for k, v in llm_client.stats().items() if isinstance(v, (int, float))} if llm_client else {},
+    ["event"],
+))
 
 # --- Groq AI Call Function ---
-def call_groq_ai(system_prompt: str, user_input: str, temperature: float = 0.7, max_tokens: int = 150) -> str:
-    """Call Groq API - ONLY WORKING MODEL: llama-3.1-8b-instant"""
-    if not groq_client:
+async def call_groq_ai(system_prompt: str, user_input: str, temperature: float = 0.7, max_tokens: int = 150,
+                       on_token=None, response_format: dict = None) -> str:
+    """Call the configured LLM backends (Groq by default: llama-3.1-8b-instant)
+
+    Backends are tried in LLM_BACKENDS order until one answers; None means
+    none did. If on_token is given the completion is streamed and
+    on_token(delta) is called for every chunk; the full text is still
+    returned at the end. Inside a session, the conversation_context summary
+    of earlier messages is sent along with the new text. Successful answers
+    are cached by (prompt, normalized input, temperature, max_tokens,
+    context), and concurrent identical non-streamed calls share one request.
+    Slow non-streamed calls may be hedged with a duplicate (see hedging.py).
+    """
+    context = conversation_context.get()
+    cache_key = make_cache_key(system_prompt, user_input, temperature, max_tokens, context)
+    if not cache_bypass.get():
+        cached = await response_cache.lookup(cache_key)
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached)
+            return cached
+
+    backends = [backend for backend in get_llm_backends() if backend.available()]
+    if not backends:
         return None
     
-    try:
-        response = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # ONLY THIS MODEL WORKS
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        return response.choices[0].message.content.strip()
-        
-    except Exception as e:
-        print(f"DEBUG: Groq API call failed: {e}")
+    async def fetch():
+        for position, backend in enumerate(backends):
+            streamed = False
+
+            def relay(delta):
+                nonlocal streamed
+                streamed = True
+                on_token(delta)
+
+            def attempt(backend=backend):
+                return backend.complete(system_prompt, user_input, temperature, max_tokens,
+                                        relay if on_token is not None else None, response_format, context)
+
+            try:
+                if on_token is None and backend.hedgeable:
+                    text = await hedger.call(backend.name, attempt)
+                else:
+                    # Streamed tokens can't be taken back, so streams are never hedged
+                    text = await attempt()
+            except Exception as e:
+                print(f"DEBUG: {backend.name} LLM call failed: {e}")
+                text = None
+            if text:
+                await response_cache.store(cache_key, text)
+                return text
+            if streamed:
+                break  # the caller already has part of this backend's reply
+            if position + 1 < len(backends):
+                BACKEND_FAILOVERS.inc(backend=backend.name)
         return None
 
+    if on_token is not None:
+        # Token callbacks belong to a single caller, so streamed calls are never shared
+        return await fetch()
+    return await llm_flights.do(cache_key, fetch)
+
 # --- AGENT FUNCTIONS ---
-def run_therapist_agent_live(user_input: str) -> str:
+async def run_agent_live(spec: AgentSpec, user_input: str, on_token=None) -> str:
+    """Calls Groq with the agent's prompt and sampling params, falling back to its canned replies."""
+    response = await call_groq_ai(spec.system_prompt, user_input, temperature=spec.temperature,
+                                  max_tokens=spec.max_tokens, on_token=on_token)
+    if response:
+        return response
+    # Counted here, where a canned reply is served: fused mode re-runs agents after an empty answer
+    record_fallback("llm_error" if any(backend.available() for backend in get_llm_backends()) else "no_llm_client")
+    return spec.fallback()
+
+async def run_therapist_agent_live(user_input: str, on_token=None) -> str:
     """Calls Groq for therapeutic advice."""
-    response = call_groq_ai(THERAPIST_SYSTEM_PROMPT, user_input, temperature=0.7, max_tokens=150)
-    return response if response else fallback_therapist_response()
+    return await run_agent_live(AGENT_REGISTRY["therapist"], user_input, on_token)
 
-def run_closure_agent_live(user_input: str) -> str:
+async def run_closure_agent_live(user_input: str, on_token=None) -> str:
     """Calls Groq for closure message."""
-    response = call_groq_ai(CLOSURE_AGENT_SYSTEM_PROMPT, user_input, temperature=0.8, max_tokens=150)
-    return response if response else fallback_closure_response()
+    return await run_agent_live(AGENT_REGISTRY["closure"], user_input, on_token)
 
-def run_routine_agent_live(user_input: str) -> str:
+async def run_routine_agent_live(user_input: str, on_token=None) -> str:
     """Calls Groq for daily routine."""
-    response = call_groq_ai(ROUTINE_PLANNER_SYSTEM_PROMPT, user_input, temperature=0.6, max_tokens=120)
-    return response if response else fallback_routine_response()
+    return await run_agent_live(AGENT_REGISTRY["routine"], user_input, on_token)
 
-def run_honesty_agent_live(user_input: str) -> str:
+async def run_honesty_agent_live(user_input: str, on_token=None) -> str:
     """Calls Groq for brutal honesty."""
-    response = call_groq_ai(BRUTAL_HONESTY_SYSTEM_PROMPT, user_input, temperature=0.5, max_tokens=100)
-    return response if response else fallback_honesty_response()
+    return await run_agent_live(AGENT_REGISTRY["honesty"], user_input, on_token)
+
+# --- Fused Mode: all selected agents in one call ---
+@lru_cache(maxsize=None)
+def fused_prompt(keys: tuple) -> tuple:
+    """(system prompt, max_tokens) asking for one JSON field per agent key."""
+    specs = resolve_agents(keys)
+    prompt = (
+        f"You are a team of {len(specs)} breakup-recovery agents answering the same user message. "
+        "Write each agent's reply exactly as that agent's instructions below describe. "
+        "Respond with ONLY a JSON object with the string fields "
+        + ", ".join(f'"{spec.key}"' for spec in specs)
+        + ", one per agent.\n\n"
+        + "\n\n".join(f'### "{spec.key}" agent\n{spec.system_prompt}' for spec in specs)
+    )
+    return prompt, sum(spec.max_tokens for spec in specs) + 40  # + JSON overhead
+
+async def run_fused_agents(user_input: str, specs: list = None) -> list:
+    """Asks for every selected agent's reply in one JSON completion.
+
+    Returns the advice for each spec, or None for agents whose field is
+    missing, empty or not a string.
+    """
+    from .schemas import AgentResponse
+    from pydantic import ValidationError
+
+    specs = specs if specs is not None else resolve_agents()
+    system_prompt, max_tokens = fused_prompt(tuple(spec.key for spec in specs))
+    agent_token = current_agent.set("fused")
+    deadline_token = llm_deadline.set(time.monotonic() + AGENT_TIMEOUT_SECONDS)
+    try:
+        text = await asyncio.wait_for(
+            call_groq_ai(system_prompt, user_input, temperature=0.7, max_tokens=max_tokens,
+                         response_format={"type": "json_object"}),
+            timeout=AGENT_TIMEOUT_SECONDS,
+        )
+        fields = json.loads(text) if text else {}
+    except Exception as e:
+        print(f"DEBUG: fused call unusable ({type(e).__name__}), running agents separately")
+        fields = {}
+    finally:
+        current_agent.reset(agent_token)
+        llm_deadline.reset(deadline_token)
+    if not isinstance(fields, dict):
+        fields = {}
+
+    advice = []
+    for spec in specs:
+        try:
+            response = AgentResponse(agent_name=spec.agent_name, role=spec.role, advice=fields.get(spec.key))
+            advice.append(response.advice.strip() or None)
+        except ValidationError:
+            advice.append(None)
+    return advice
+
+async def run_agent_with_timeout(spec: AgentSpec, user_input: str, on_token=None) -> str:
+    """Runs one agent, falling back to its canned response on error or timeout.
+
+    Meant to run in its own task, since it tags the task's LLM calls with the
+    agent name for metrics.
+    """
+    current_agent.set(spec.agent_name)
+    llm_deadline.set(time.monotonic() + AGENT_TIMEOUT_SECONDS)
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(run_agent_live(spec, user_input, on_token=on_token),
+                                      timeout=AGENT_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"DEBUG: {spec.agent_name} timed out after {AGENT_TIMEOUT_SECONDS}s")
+        record_fallback("timeout")
+    except Exception as e:
+        print(f"DEBUG: {spec.agent_name} failed: {e}")
+        record_fallback("error")
+    finally:
+        record_agent(spec.agent_name, time.perf_counter() - started)
+    return spec.fallback()
+
+def _agent_keys(user_input: "UserInput") -> tuple:
+    """The selected agent keys in plan order, used to tell runs for different subsets apart."""
+    return tuple(spec.key for spec in resolve_agents(user_input.agents))
 
 # --- Multi-Agent Orchestration ---
-def run_multi_agent_stub(user_input: "UserInput") -> "RecoveryPlan":
-    """Runs ALL FOUR agents using Groq."""
-    
+async def run_multi_agent_stub(user_input: "UserInput") -> "RecoveryPlan":
+    """Runs the selected agents (all four by default) concurrently using Groq.
+
+    Concurrent requests with the same normalized text, agents and session
+    share one run. With a session_id, the agents also see a summary of the
+    session's earlier messages, and this message is added to it (once, however
+    many callers shared the run) when the plan is ready.
+    """
+    session_id = user_input.session_id
+    context = session_store.context(session_id) if session_id else None
+    key = (normalize_input(user_input.feelings_description), _agent_keys(user_input), session_id, context,
+           cache_bypass.get())
+
+    async def run():
+        plan = await _run_multi_agent(user_input, context)
+        if session_id:
+            session_store.add_turn(session_id, user_input.feelings_description)
+        return plan
+
+    plan = await plan_flights.do(key, run)
+    if session_id:
+        plan = plan.model_copy(update={"session_id": session_id})
+    return plan
+
+async def _run_multi_agent(user_input: "UserInput", context: str = None) -> "RecoveryPlan":
     # Import here to avoid circular imports
     from .schemas import RecoveryPlan, AgentResponse
     
-    print(f"\n🚀 Running Breakup Recovery Agents...")
+    # Runs in its own task (see plan_flights), so this only reaches this plan's LLM calls
+    conversation_context.set(context)
+    specs = resolve_agents(user_input.agents)
+    print(f"\n🚀 Running Breakup Recovery Agents ({', '.join(spec.key for spec in specs)})...")
     print(f"📝 User: '{user_input.feelings_description[:50]}...'")
+    # Trimmed once here; every agent gets the same text
+    prepared = prepare_input(user_input.feelings_description, specs, context)
+    print(f"📏 Input ~{prepared.tokens} tokens, plan at most ~{prepared.predicted_tokens(specs, context)} tokens")
     
-    therapist_advice = run_therapist_agent_live(user_input.feelings_description)
-    closure_advice = run_closure_agent_live(user_input.feelings_description)
-    routine_advice = run_routine_agent_live(user_input.feelings_description)
-    honesty_advice = run_honesty_agent_live(user_input.feelings_description)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PLAN_TIMEOUT_SECONDS
+
+    advice = [None] * len(specs)
+    # A single agent is one call either way, so fusing only pays off for two or more
+    if ORCHESTRATION_MODE == "fused" and len(specs) > 1:
+        advice = await run_fused_agents(prepared.text, specs)
+        missing = advice.count(None)
+        if missing:
+            print(f"DEBUG: fused reply missing {missing} agent(s), re-running them separately")
+
+    # Run (or re-run, in fused mode) every agent that has no advice yet
+    tasks = {
+        index: asyncio.create_task(
+            run_agent_with_timeout(spec, prepared.text)
+        )
+        for index, spec in enumerate(specs)
+        if advice[index] is None
+    }
+    done, pending = set(), set()
+    if tasks:
+        try:
+            done, pending = await asyncio.wait(tasks.values(), timeout=max(0, deadline - loop.time()))
+        except asyncio.CancelledError:
+            # Every caller of this plan gave up (see plan_flights), so its agents stop too
+            for task in tasks.values():
+                task.cancel()
+            raise
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"DEBUG: {len(pending)} agent(s) still running after {PLAN_TIMEOUT_SECONDS}s, using fallbacks")
+
+    for index, task in tasks.items():
+        if task in done:
+            advice[index] = task.result()
+        else:
+            record_fallback("plan_timeout", agent=specs[index].agent_name)
+            advice[index] = specs[index].fallback()
 
+    # Every field is a registry constant or a string we produced, so skip re-validating them
     final_agent_data = [
-        AgentResponse(
-            agent_name="Therapist Agent",
-            role="Empathetic support and coping strategies.",
-            advice=therapist_advice
-        ),
-        AgentResponse(
-            agent_name="Closure Agent",
-            role="Generates emotional messages you shouldn't send (for catharsis).",
-            advice=closure_advice
-        ),
-        AgentResponse(
-            agent_name="Routine Planner Agent",
-            role="Suggests daily routine and healthy distractions.",
-            advice=routine_advice
-        ),
-        AgentResponse(
-            agent_name="Brutal Honesty Agent",
-            role="Provides direct, no-nonsense feedback.",
-            advice=honesty_advice
-        ),
+        AgentResponse.model_construct(agent_name=spec.agent_name, role=spec.role, advice=agent_advice)
+        for spec, agent_advice in zip(specs, advice)
     ]
 
-    summary = (
-        "All four AI agents have analyzed your situation. You received: "
-        "1) Emotional validation and coping strategies, "
-        "2) A cathartic message draft for release, "
-        "3) A practical daily recovery routine, "
-        "4) Objective insights about the situation. "
-        "Remember, healing takes time - be gentle with yourself."
-    )
+    return RecoveryPlan.model_construct(summary=plan_summary(specs), agents=final_agent_data, session_id=None)
+
+async def stream_multi_agent(user_input: "UserInput"):
+    """Runs the selected agents concurrently and yields (event, data) pairs as they progress.
+
+    Events, in order of arrival:
+      ("token", {"index", "agent_name", "delta"})  - streamed text from an agent
+      ("agent", {"index", "agent_name", "role", "advice"}) - an agent's final answer
+      ("summary", {"summary", "session_id"}) - always last
+
+    Streaming always runs one call per agent, whatever ORCHESTRATION_MODE says.
+    """
+    session_id = user_input.session_id
+    context = session_store.context(session_id) if session_id else None
+    specs = resolve_agents(user_input.agents)
+    print(f"\n🚀 Streaming Breakup Recovery Agents ({', '.join(spec.key for spec in specs)})...")
+    print(f"📝 User: '{user_input.feelings_description[:50]}...'")
+    prepared = prepare_input(user_input.feelings_description, specs, context)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PLAN_TIMEOUT_SECONDS
+    events = asyncio.Queue()
+
+    async def run_one(index, spec):
+        conversation_context.set(context)
+
+        def on_token(delta):
+            events.put_nowait(("token", {"index": index, "agent_name": spec.agent_name, "delta": delta}))
+
+        advice = await run_agent_with_timeout(spec, prepared.text, on_token)
+        events.put_nowait(("agent", {"index": index, "agent_name": spec.agent_name, "role": spec.role,
+                                     "advice": advice}))
 
-    return RecoveryPlan(summary=summary, agents=final_agent_data)
\ No newline at end of file
+    tasks = [
+        asyncio.create_task(run_one(index, spec))
+        for index, spec in enumerate(specs)
+    ]
+    finished = set()
+    try:
+        while len(finished) < len(tasks):
+            try:
+                event, data = await asyncio.wait_for(events.get(), timeout=max(0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                break
+            if event == "agent":
+                finished.add(data["index"])
+            yield event, data
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    for index, spec in enumerate(specs):
+        if index not in finished:
+            print(f"DEBUG: {spec.agent_name} still running after {PLAN_TIMEOUT_SECONDS}s, using fallback")
+            record_fallback("plan_timeout", agent=spec.agent_name)
+            yield "agent", {"index": index, "agent_name": spec.agent_name, "role": spec.role,
+                            "advice": spec.fallback()}
+
+    if session_id:
+        session_store.add_turn(session_id, user_input.feelings_description)
+    yield "summary", {"summary": plan_summary(specs), "session_id": session_id}
+
+# --- Batch Processing ---
+class BatchSlots:
+    """Agent-call slots shared by every batch request in this process.
+
+    A plan takes the slots for all its agents at once, so a started plan never
+    waits for slots while its deadline runs. Plans wait their turn in arrival
+    order, so a big plan is not starved by smaller ones behind it.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.free = total
+        self.waiting = 0
+        self._changed = asyncio.Condition()
+        self._order = asyncio.Lock()  # one plan waits for slots at a time
+
+    @asynccontextmanager
+    async def hold(self, count: int):
+        count = min(count, self.total)
+        self.waiting += 1
+        try:
+            async with self._order:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self.free >= count)
+                    self.free -= count
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self.free += count
+                self._changed.notify_all()
+
+
+batch_slots = BatchSlots(BATCH_MAX_CONCURRENCY)
+
+register(Gauge(
+    "recovery_batch_agent_slots", "Batch agent-call slots in use, and plans waiting for slots.",
+    lambda: {("in_use",): batch_slots.total - batch_slots.free, ("waiting",): batch_slots.waiting},
+    ["state"],
+))
+
+async def run_multi_agent_batch(user_inputs: list):
+    """Runs the agents for many inputs and yields (index, RecoveryPlan) as each plan completes.
+
+    Inputs that normalize to the same text (and ask for the same agents, in
+    the same session) are run once and reported for every index they appear at.
+    Plans start in input order as batch_slots frees up, so all batch requests
+    together run at most BATCH_MAX_CONCURRENCY agent calls. Finished plans wait
+    for the reader in a queue bounded by the number of running plans, so memory
+    stays flat for large batches and slow readers.
+    """
+    groups = {}
+    for index, user_input in enumerate(user_inputs):
+        key = (normalize_input(user_input.feelings_description), _agent_keys(user_input), user_input.session_id)
+        groups.setdefault(key, []).append(index)
+
+    pending = asyncio.Queue()
+    for key, indices in groups.items():
+        pending.put_nowait((len(key[1]), indices))
+    print(f"\n📦 Batch: {len(user_inputs)} inputs, {len(groups)} unique, "
+          f"{batch_slots.free}/{batch_slots.total} agent-call slots free")
+
+    worker_count = min(len(groups), batch_slots.total)
+    results = asyncio.Queue(maxsize=max(1, worker_count))
+
+    async def worker():
+        while not pending.empty():
+            slots, indices = pending.get_nowait()
+            try:
+                async with batch_slots.hold(slots):
+                    plan = await run_multi_agent_stub(user_inputs[indices[0]])
+            except Exception as e:
+                plan = e  # re-raised for the reader instead of leaving it waiting forever
+            await results.put((indices, plan))
+
+    workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
+    try:
+        for _ in range(len(groups)):
+            indices, plan = await results.get()
+            if isinstance(plan, Exception):
+                raise plan
+            for index in indices:
+                yield index, plan
+    finally:
+        for task in workers:
+            task.cancel()
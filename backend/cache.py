@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+from .config import LLM_CACHE_BACKEND, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH
+from .metrics import Gauge, register
+
+# Set per request (see main.py) when the client asks to skip cached answers.
+cache_bypass: ContextVar[bool] = ContextVar("cache_bypass", default=False)
+
+
+def normalize_input(text: str) -> str:
+    """Folds trivially different submissions ("I feel lost!!" / "i feel  lost") onto one key."""
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.strip(" .!?,;:")
+
+
+def make_cache_key(system_prompt: str, user_input: str, temperature: float, max_tokens: int,
+                   context: str = None) -> str:
+    parts = [system_prompt, normalize_input(user_input), temperature, max_tokens]
+    if context:
+        parts.append(context)  # earlier conversation; stateless calls keep their existing keys
+    raw = json.dumps(parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Base class: counts hits, misses and evictions for whichever backend is in use."""
+
+    backend = "none"
+    blocking = False  # get/set do disk I/O, so async callers run them in a thread
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        pass
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """get() for async callers: keeps a slow or locked store off the event loop."""
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def store(self, key: str, value: str) -> None:
+        if self.blocking:
+            return await asyncio.to_thread(self.set, key, value)
+        return self.set(key, value)
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "size": len(self)}
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU cache with a per-entry TTL."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(ResponseCache):
+    """On-disk cache that survives restarts; evicts least recently used rows past max_entries."""
+
+    backend = "sqlite"
+    blocking = True
+    # Server workers share the file; rather than queue behind another worker's write, treat it as a miss
+    busy_timeout_seconds = 0.5
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=self.busy_timeout_seconds, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is None or row[1] < now:
+                    if row is not None:
+                        self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        self.evictions += 1
+                    self.misses += 1
+                    return None
+                self._db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            except sqlite3.OperationalError as e:
+                print(f"DEBUG: LLM cache busy, treating as a miss ({e})")
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self._set(key, value)
+        except sqlite3.OperationalError as e:
+            print(f"DEBUG: LLM cache busy, answer not cached ({e})")
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            expired = self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,)).rowcount
+            overflow = self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self.evictions += expired + overflow
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+def build_cache() -> ResponseCache:
+    if LLM_CACHE_BACKEND == "sqlite":
+        return SQLiteCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS)
+    if LLM_CACHE_BACKEND == "memory":
+        return MemoryCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS)
+    return ResponseCache()
+
+
+response_cache = build_cache()
+
+register(Gauge(
+    "recovery_llm_cache_events", "LLM response cache hits, misses, evictions and current size.",
+    lambda: {(k,): v for k, v in response_cache.stats().items() if k != "backend"},
+    ["event"],
+))
@@ -0,0 +1,136 @@
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# --- Load .env once for the whole backend ---
+BASE_DIR = Path(__file__).resolve().parent.parent
+dotenv_path = BASE_DIR / '.env'
+load_dotenv(dotenv_path=dotenv_path)
+
+# --- Groq ---
+api_key_raw = os.getenv("GROQ_API_KEY")
+GROQ_API_KEY = api_key_raw.strip('"\'') if api_key_raw else None  # Remove quotes if present
+
+# --- Orchestration Timeouts (seconds) ---
+AGENT_TIMEOUT_SECONDS = float(os.getenv("AGENT_TIMEOUT_SECONDS", "15"))
+PLAN_TIMEOUT_SECONDS = float(os.getenv("PLAN_TIMEOUT_SECONDS", "25"))
+
+# --- Admission Control ---
+# Requests running agents at once, and requests allowed to wait for a slot
+# before new ones are turned away with 503.
+MAX_IN_FLIGHT_REQUESTS = int(os.getenv("MAX_IN_FLIGHT_REQUESTS", "200"))
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", "100"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "5"))
+
+# --- LLM Response Cache ---
+# LLM_CACHE_BACKEND: "memory" (in-process LRU), "sqlite" (survives restarts) or "none"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(BASE_DIR / ".cache" / "llm_cache.sqlite3"))
+
+# --- LLM Client (connection pool, retries, circuit breaker, rate limit) ---
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "100"))
+LLM_POOL_KEEPALIVE = int(os.getenv("LLM_POOL_KEEPALIVE", "20"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "30"))
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+# Groq free tier for llama-3.1-8b-instant allows 30 requests/minute; 0 disables the limiter.
+# The limit is per process: run.py --prod divides it (and the burst) between its workers.
+# A call whose token would only arrive after its agent's timeout falls back at once instead of queueing.
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "30"))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+
+# --- Hedged LLM Calls ---
+# When on, a call still unanswered after the LLM_HEDGE_PERCENTILE latency of recent
+# calls (same agent and backend) is sent again and the first answer wins.
+# Duplicates are capped at LLM_HEDGE_BUDGET_PERCENT of calls.
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE", "off").lower() in ("1", "on", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+LLM_HEDGE_BUDGET_PERCENT = float(os.getenv("LLM_HEDGE_BUDGET_PERCENT", "10"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "500"))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.05"))
+
+# --- LLM Backends ---
+# Backends tried in order for each call until one answers: "groq" (remote API),
+# "local" (a GGUF model on CPU via llama-cpp-python) and "mock" (deterministic
+# canned replies, no network). "local,groq" is local-first with remote fallback.
+LLM_BACKENDS = [name.strip().lower() for name in os.getenv("LLM_BACKENDS", "groq").split(",") if name.strip()]
+LLM_LOCAL_MODEL_PATH = os.getenv("LLM_LOCAL_MODEL_PATH")
+LLM_LOCAL_CONTEXT = int(os.getenv("LLM_LOCAL_CONTEXT", "2048"))
+LLM_LOCAL_THREADS = int(os.getenv("LLM_LOCAL_THREADS", "0")) or None  # None: llama.cpp picks
+# Requests the local model takes from its queue at once, and how long it waits to fill a batch
+LLM_LOCAL_BATCH_SIZE = int(os.getenv("LLM_LOCAL_BATCH_SIZE", "8"))
+LLM_LOCAL_BATCH_WAIT_MS = float(os.getenv("LLM_LOCAL_BATCH_WAIT_MS", "5"))
+# Simulated latency for the mock backend
+LLM_MOCK_DELAY_SECONDS = float(os.getenv("LLM_MOCK_DELAY_SECONDS", "0"))
+
+# --- Input Pre-processing ---
+# What to do with user text over budget: "summarize" (keep the key sentences),
+# "truncate" (keep the opening) or "off" (send it as is)
+INPUT_MODE = os.getenv("INPUT_MODE", "summarize").lower()
+# Approximate tokens for one agent call: system prompt + session context + user text + max_tokens reply
+AGENT_TOKEN_BUDGET = int(os.getenv("AGENT_TOKEN_BUDGET", "1024"))
+# Bounds on the user text itself, whatever the budget leaves for it
+INPUT_MAX_TOKENS = int(os.getenv("INPUT_MAX_TOKENS", "512"))
+INPUT_MIN_TOKENS = int(os.getenv("INPUT_MIN_TOKENS", "64"))
+
+# --- Conversation Sessions ---
+# Sessions kept in memory (least recently used dropped first) and how long an idle one lives
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "86400"))
+# Per session: messages kept verbatim, and caps on the rolling summary of older ones
+SESSION_RECENT_TURNS = int(os.getenv("SESSION_RECENT_TURNS", "2"))
+SESSION_TURN_MAX_CHARS = int(os.getenv("SESSION_TURN_MAX_CHARS", "600"))
+SESSION_COMPACT_TURN_CHARS = int(os.getenv("SESSION_COMPACT_TURN_CHARS", "200"))
+SESSION_SUMMARY_MAX_CHARS = int(os.getenv("SESSION_SUMMARY_MAX_CHARS", "1200"))
+
+# --- Batch Processing ---
+# Agent calls in flight at once across all /run_agents/batch requests in this process
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+
+# --- Job Queue (POST /jobs) ---
+# JOBS_BACKEND: "memory" (in-process), "sqlite" (kept across restarts and shared by
+# every worker process; run.py --prod picks it unless JOBS_BACKEND is set) or "none"
+# to turn job mode off
+JOBS_BACKEND = os.getenv("JOBS_BACKEND", "memory").lower()
+JOBS_PATH = os.getenv("JOBS_PATH", str(BASE_DIR / ".cache" / "jobs.sqlite3"))
+# Background workers per server process, each running one plan at a time
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOBS_MAX_QUEUED = int(os.getenv("JOBS_MAX_QUEUED", "10000"))
+JOBS_RESULT_TTL_SECONDS = float(os.getenv("JOBS_RESULT_TTL_SECONDS", "3600"))
+# Longest a GET /jobs/{id}?wait= long-poll may hold the connection
+JOBS_MAX_WAIT_SECONDS = float(os.getenv("JOBS_MAX_WAIT_SECONDS", "30"))
+# How often idle workers and long-polls re-check the queue for changes made by other processes
+JOBS_POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "0.5"))
+# A SQLite job still "running" after this long is assumed lost with its worker and handed out again
+JOBS_STALE_SECONDS = float(os.getenv("JOBS_STALE_SECONDS", "120"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+
+# --- Orchestration Mode ---
+# "parallel": one LLM call per agent. "fused": one combined call for all four
+# agents, re-running only the agents whose part came back missing or malformed.
+ORCHESTRATION_MODE = os.getenv("ORCHESTRATION_MODE", "parallel").lower()
+
+# --- Metrics ---
+# Requests slower than this are logged with their per-agent timing breakdown (0 = off)
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "0"))
+
+# --- Server ---
+HOST = os.getenv("HOST", "127.0.0.1")
+PORT = int(os.getenv("PORT", "8000"))
+# Worker processes in production mode (default: one per CPU)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or (os.cpu_count() or 1)
+# How long shutdown waits for in-flight agent runs before closing connections
+GRACEFUL_SHUTDOWN_SECONDS = float(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30"))
+# Startup warmup: each worker imports the agents and builds its LLM client and
+# backends before taking traffic. WARMUP_PRIME=on also sends one tiny completion
+# so the first request finds an open connection (costs one short LLM call per worker).
+WARMUP_PRIME = os.getenv("WARMUP_PRIME", "off").lower() in ("1", "on", "true", "yes")
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "10"))
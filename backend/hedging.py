@@ -0,0 +1,154 @@
+import asyncio
+import time
+from collections import deque
+
+from .config import (
+    LLM_HEDGE_ENABLED, LLM_HEDGE_PERCENTILE, LLM_HEDGE_BUDGET_PERCENT, LLM_HEDGE_MIN_SAMPLES, LLM_HEDGE_WINDOW,
+    LLM_HEDGE_MIN_DELAY_SECONDS,
+)
+from .metrics import Counter, Gauge, Histogram, current_agent, register
+
+HEDGES = register(Counter(
+    "recovery_llm_hedges_total",
+    "Hedged LLM calls: sent, won (the duplicate answered first), lost, or skipped for lack of budget.",
+    ["agent", "outcome"]))
+ANSWER_LATENCY = register(Histogram(
+    "recovery_llm_answer_seconds", "Time until an LLM call had its answer, hedge included if one was sent.",
+    ["agent", "hedged"]))
+
+
+class Hedger:
+    """Sends a duplicate of a slow LLM call and takes whichever answer comes first.
+
+    The hedge delay is the `percentile` of recent latencies for the same
+    agent and backend, kept in a rolling window of `window` samples. Hedges
+    come out of a budget that grows by `budget_percent`/100 per call, so
+    duplicates stay at most that share of traffic (plus a small burst).
+    """
+
+    def __init__(self, enabled: bool, percentile: float, budget_percent: float, min_samples: int, window: int,
+                 min_delay: float):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget_ratio = budget_percent / 100
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self._latencies = {}  # (backend, agent) -> deque of seconds
+        self._delays = {}  # (backend, agent) -> cached hedge delay
+        self._recorded = {}  # (backend, agent) -> samples recorded, for refreshing the cached delay
+        self._budget = 1.0
+        self.calls = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def record(self, key, latency: float):
+        samples = self._latencies.get(key)
+        if samples is None:
+            samples = self._latencies[key] = deque(maxlen=self.window)
+        samples.append(latency)
+        # Re-sort only every few samples; the percentile moves slowly. Counted
+        # separately from the window, whose length stops changing once full.
+        recorded = self._recorded[key] = self._recorded.get(key, 0) + 1
+        if recorded % 10 == 0:
+            self._delays.pop(key, None)
+
+    def delay(self, key):
+        """Seconds to wait before hedging, or None while there are too few samples."""
+        samples = self._latencies.get(key)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        if key not in self._delays:
+            ordered = sorted(samples)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            self._delays[key] = max(self.min_delay, ordered[index])
+        return self._delays[key]
+
+    def _spend(self) -> bool:
+        if self._budget >= 1:
+            self._budget -= 1
+            return True
+        return False
+
+    async def call(self, backend: str, make_call):
+        """Awaits make_call(), hedging it with a second make_call() if the first is slow.
+
+        A failed or empty answer from one attempt does not win while the
+        other is still running.
+        """
+        if not self.enabled:
+            return await make_call()
+        agent = current_agent.get()
+        key = (backend, agent)
+        self.calls += 1
+        self._budget = min(10.0, self._budget + self.budget_ratio)
+        started = time.perf_counter()
+        delay = self.delay(key)
+
+        primary = asyncio.create_task(self._timed(key, make_call))
+        attempts = [primary]
+        try:
+            if delay is not None:
+                await asyncio.wait(attempts, timeout=delay)
+                if not primary.done():
+                    if self._spend():
+                        self.hedges += 1
+                        HEDGES.inc(agent=agent, outcome="sent")
+                        attempts.append(asyncio.create_task(self._timed(key, make_call)))
+                    else:
+                        HEDGES.inc(agent=agent, outcome="skipped_budget")
+
+            result, winner = None, None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if winner is None and not task.exception() and task.result():
+                        result, winner = task.result(), task
+                if winner is not None:
+                    break
+            if winner is None:
+                # Nobody produced text: surface the primary's outcome as before
+                return primary.result()
+            if len(attempts) > 1:
+                hedge_won = winner is not primary
+                self.wins += hedge_won
+                HEDGES.inc(agent=agent, outcome="won" if hedge_won else "lost")
+            return result
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+            ANSWER_LATENCY.observe(time.perf_counter() - started, agent=agent,
+                                   hedged="yes" if len(attempts) > 1 else "no")
+
+    async def _timed(self, key, make_call):
+        started = time.perf_counter()
+        text = await make_call()
+        # Only real answers: instant failures (open circuit, rate limit, 4xx) and
+        # cancelled losers would drag the percentile down and hedge everything
+        if text:
+            self.record(key, time.perf_counter() - started)
+        return text
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.wins,
+            "extra_call_ratio": round(self.hedges / self.calls, 4) if self.calls else 0.0,
+            "delays": {f"{backend}/{agent}": round(self.delay((backend, agent)) or 0, 3)
+                       for backend, agent in self._latencies},
+        }
+
+
+hedger = Hedger(LLM_HEDGE_ENABLED, LLM_HEDGE_PERCENTILE, LLM_HEDGE_BUDGET_PERCENT, LLM_HEDGE_MIN_SAMPLES,
+                LLM_HEDGE_WINDOW, LLM_HEDGE_MIN_DELAY_SECONDS)
+
+register(Gauge(
+    "recovery_llm_hedge_events", "Hedging totals: calls seen, duplicates sent and duplicates that answered first.",
+    lambda: {("calls",): hedger.calls, ("hedges",): hedger.hedges, ("hedge_wins",): hedger.wins},
+    ["event"],
+))
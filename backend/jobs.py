@@ -0,0 +1,349 @@
+import asyncio
+import heapq
+import itertools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from .config import (
+    JOBS_BACKEND, JOBS_PATH, JOB_WORKERS, JOBS_MAX_QUEUED, JOBS_RESULT_TTL_SECONDS, JOBS_POLL_SECONDS,
+    JOBS_STALE_SECONDS, JOBS_MAX_ATTEMPTS,
+)
+from .metrics import QUEUE_WAIT, Gauge, RequestTrace, current_trace, register
+
+FINISHED = ("done", "failed")
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when JOBS_MAX_QUEUED jobs are already waiting."""
+
+
+class JobQueue:
+    """Base class: a priority queue of /run_agents requests plus their results.
+
+    Jobs go queued -> running -> done | failed. Higher priority runs first,
+    then oldest first. Finished jobs are kept for `result_ttl` seconds.
+    """
+
+    backend = "none"
+    blocking = False  # storage calls do I/O, so the async methods run them in a thread
+
+    def __init__(self, max_queued: int, result_ttl: float):
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self._wakeup = asyncio.Event()
+        self._finished = {}  # job id -> asyncio.Event, for long-polling clients
+
+    # Storage, implemented per backend
+    def submit(self, request: str, priority: int = 0) -> dict:
+        raise JobQueueFull("job queue is disabled")
+
+    def claim(self) -> Optional[dict]:
+        return None
+
+    def store_result(self, job_id: str, result: str = None, error: str = None) -> None:
+        pass
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return None
+
+    def counts(self) -> dict:
+        return {}
+
+    # Shared plumbing
+    async def _storage(self, method, *args):
+        if self.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def put(self, request: str, priority: int = 0) -> dict:
+        job = await self._storage(self.submit, request, priority)
+        self._wakeup.set()
+        return job
+
+    async def fetch(self, job_id: str) -> Optional[dict]:
+        """get() for async callers."""
+        return await self._storage(self.get, job_id)
+
+    async def finish(self, job_id: str, result: str = None, error: str = None) -> None:
+        await self._storage(self.store_result, job_id, result, error)
+        event = self._finished.get(job_id)
+        if event is not None:
+            event.set()
+
+    async def take(self) -> dict:
+        """Waits for the next job and marks it running."""
+        while True:
+            job = await self._storage(self.claim)
+            if job is not None:
+                return job
+            self._wakeup.clear()
+            try:
+                # Also polls, so jobs submitted by other processes (SQLite) are picked up
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOBS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Returns the job once it has finished, or as it stands when `timeout` runs out."""
+        deadline = time.monotonic() + timeout
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        try:
+            while True:
+                job = await self.fetch(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, JOBS_POLL_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._finished.pop(job_id, None)
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, **{status: 0 for status in ("queued", "running", *FINISHED)},
+                **self.counts()}
+
+
+class MemoryJobQueue(JobQueue):
+    """In-process queue; jobs are lost on restart and not shared between server workers."""
+
+    backend = "memory"
+
+    def __init__(self, max_queued: int, result_ttl: float):
+        super().__init__(max_queued, result_ttl)
+        self._jobs = {}
+        self._heap = []  # (-priority, seq, job id)
+        self._seq = itertools.count()
+        self._done = OrderedDict()  # finished job id -> finished_at, oldest first
+
+    def submit(self, request: str, priority: int = 0) -> dict:
+        self._prune()
+        if len(self._heap) >= self.max_queued:
+            raise JobQueueFull(f"{len(self._heap)} jobs queued")
+        job = {
+            "job_id": uuid.uuid4().hex, "status": "queued", "priority": priority, "attempts": 0,
+            "request": request, "result": None, "error": None,
+            "created_at": time.time(), "started_at": None, "finished_at": None,
+        }
+        self._jobs[job["job_id"]] = job
+        heapq.heappush(self._heap, (-priority, next(self._seq), job["job_id"]))
+        return dict(job)
+
+    def claim(self) -> Optional[dict]:
+        if not self._heap:
+            return None
+        _, _, job_id = heapq.heappop(self._heap)
+        job = self._jobs[job_id]
+        job.update(status="running", started_at=time.time(), attempts=job["attempts"] + 1)
+        return dict(job)
+
+    def store_result(self, job_id: str, result: str = None, error: str = None) -> None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.update(status="failed" if error else "done", result=result, error=error, finished_at=time.time())
+        self._done[job_id] = job["finished_at"]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        self._prune()
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        while self._done and next(iter(self._done.values())) < cutoff:
+            job_id, _ = self._done.popitem(last=False)
+            self._jobs.pop(job_id, None)
+
+    def counts(self) -> dict:
+        # Called from threadpool routes (GET /jobs, /metrics) while the event loop adds jobs
+        counts = {}
+        for job in list(self._jobs.values()):
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+
+class SQLiteJobQueue(JobQueue):
+    """On-disk queue shared by every server worker on this machine and kept across restarts.
+
+    A job left running by a worker that died is handed out again after
+    `stale_seconds`, up to `max_attempts` times, then marked failed.
+    """
+
+    backend = "sqlite"
+    # busy_timeout can hold a call for seconds while another process writes
+    blocking = True
+    COLUMNS = ("job_id", "status", "priority", "attempts", "request", "result", "error",
+               "created_at", "started_at", "finished_at")
+
+    def __init__(self, path: str, max_queued: int, result_ttl: float, stale_seconds: float, max_attempts: int):
+        super().__init__(max_queued, result_ttl)
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, request TEXT NOT NULL, result TEXT, error TEXT,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_next ON jobs (status, priority DESC, created_at)")
+
+    def _row(self, row) -> Optional[dict]:
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def submit(self, request: str, priority: int = 0) -> dict:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                             (now - self.result_ttl,))
+            queued = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"{queued} jobs queued")
+            self._db.execute(
+                "INSERT INTO jobs (job_id, status, priority, request, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, priority, request, now),
+            )
+            return self._row(self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone())
+
+    def claim(self) -> Optional[dict]:
+        now = time.time()
+        stale_before = now - self.stale_seconds
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'worker lost the job too many times', finished_at = ?"
+                " WHERE status = 'running' AND started_at < ? AND attempts >= ?",
+                (now, stale_before, self.max_attempts),
+            )
+            # One statement, so two processes can never claim the same job
+            row = self._db.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1"
+                " WHERE job_id = ("
+                "  SELECT job_id FROM jobs WHERE status = 'queued' OR (status = 'running' AND started_at < ?)"
+                "  ORDER BY priority DESC, created_at LIMIT 1)"
+                f" RETURNING {', '.join(self.COLUMNS)}",
+                (now, stale_before),
+            ).fetchone()
+            return self._row(row)
+
+    def store_result(self, job_id: str, result: str = None, error: str = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                ("failed" if error else "done", result, error, time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._row(self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone())
+        if job and job["status"] in FINISHED and job["finished_at"] < time.time() - self.result_ttl:
+            return None
+        return job
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def build_job_queue() -> JobQueue:
+    if JOBS_BACKEND == "sqlite":
+        return SQLiteJobQueue(JOBS_PATH, JOBS_MAX_QUEUED, JOBS_RESULT_TTL_SECONDS, JOBS_STALE_SECONDS,
+                              JOBS_MAX_ATTEMPTS)
+    if JOBS_BACKEND == "memory":
+        return MemoryJobQueue(JOBS_MAX_QUEUED, JOBS_RESULT_TTL_SECONDS)
+    return JobQueue(JOBS_MAX_QUEUED, JOBS_RESULT_TTL_SECONDS)
+
+
+def job_view(job: dict) -> dict:
+    """A job as the API returns it: no raw request, result parsed back into a RecoveryPlan dict."""
+    view = {key: value for key, value in job.items() if key != "request"}
+    view["result"] = json.loads(job["result"]) if job["result"] else None
+    return view
+
+
+# --- Worker Pool ---
+class JobWorkers:
+    """Background tasks that drain the job queue through run_multi_agent_stub."""
+
+    def __init__(self, queue: JobQueue, count: int):
+        self.queue = queue
+        self.count = count
+        self._tasks = []
+        self._busy = set()
+        self._stopping = False
+
+    def start(self):
+        if self.queue.backend == "none" or self.count <= 0:
+            return
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.count)]
+        print(f"✓ {self.count} job worker(s) on the {self.queue.backend} job queue")
+
+    def stop_taking(self):
+        """Stops idle workers now; busy ones stop after their current job."""
+        self._stopping = True
+        for task in self._tasks:
+            if task not in self._busy:
+                task.cancel()
+
+    async def stop(self, timeout: float):
+        """Lets running jobs finish for up to `timeout` seconds; idle workers stop at once."""
+        self.stop_taking()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()  # SQLite jobs cut off here are handed out again after JOBS_STALE_SECONDS
+        self._tasks = []
+
+    async def _work(self):
+        task = asyncio.current_task()
+        while not self._stopping:
+            job = await self.queue.take()
+            self._busy.add(task)
+            try:
+                await self._run(job)
+            finally:
+                self._busy.discard(task)
+
+    async def _run(self, job: dict):
+        from .agents import run_multi_agent_stub
+        from .schemas import UserInput
+
+        trace = RequestTrace("/jobs")
+        current_trace.set(trace)
+        trace.queue_wait = job["started_at"] - job["created_at"]
+        QUEUE_WAIT.observe(trace.queue_wait, route="/jobs")
+        try:
+            plan = await run_multi_agent_stub(UserInput.model_validate_json(job["request"]))
+            await self.queue.finish(job["job_id"], result=plan.model_dump_json())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"DEBUG: job {job['job_id']} failed: {e}")
+            await self.queue.finish(job["job_id"], error=str(e))
+        finally:
+            trace.finish()
+
+
+job_queue = build_job_queue()
+job_workers = JobWorkers(job_queue, JOB_WORKERS)
+
+register(Gauge(
+    "recovery_jobs", "Jobs by status in the job queue.",
+    lambda: {(k,): v for k, v in job_queue.stats().items() if k != "backend"},
+    ["status"],
+))
@@ -0,0 +1,348 @@
+import asyncio
+import hashlib
+import importlib.util
+import json
+import queue
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from .config import (
+    LLM_LOCAL_MODEL_PATH, LLM_LOCAL_CONTEXT, LLM_LOCAL_THREADS, LLM_LOCAL_BATCH_SIZE, LLM_LOCAL_BATCH_WAIT_MS,
+    LLM_MOCK_DELAY_SECONDS,
+)
+from .metrics import Counter, record_llm_call, register
+
+# time.monotonic() by which whoever is waiting on the current LLM call gives up (set per agent)
+llm_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+BACKEND_FAILOVERS = register(Counter(
+    "recovery_llm_backend_failovers_total", "LLM calls a backend could not answer and passed to the next one.",
+    ["backend"]))
+
+
+def build_messages(system_prompt: str, user_input: str, context: str = None) -> list:
+    """Chat messages for one call; earlier conversation, if any, rides along as a second system message."""
+    messages = [{"role": "system", "content": system_prompt}]
+    if context:
+        messages.append({"role": "system", "content": "This user has written to you before.\n" + context})
+    messages.append({"role": "user", "content": user_input})
+    return messages
+
+
+class LLMBackend:
+    """One way of turning (system prompt, user input) into text.
+
+    complete() returns the reply, or raises / returns None so the next
+    backend in LLM_BACKENDS gets a turn. If on_token is given the reply is
+    streamed through it as well. context is a summary of the user's earlier
+    messages in a session (see build_messages).
+    """
+    name = "base"
+    hedgeable = True  # whether a duplicate call can finish sooner (see hedging.py)
+
+    def available(self) -> bool:
+        return True
+
+    async def complete(self, system_prompt: str, user_input: str, temperature: float, max_tokens: int,
+                       on_token=None, response_format: dict = None, context: str = None) -> str:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {"available": self.available()}
+
+    async def aclose(self):
+        pass
+
+
+# --- Groq (remote) ---
+class GroqBackend(LLMBackend):
+    """Chat completions against Groq through this process's LLMClient."""
+    name = "groq"
+
+    def __init__(self, get_client, model: str):
+        self.get_client = get_client
+        self.model = model
+
+    def available(self) -> bool:
+        return self.get_client() is not None
+
+    async def complete(self, system_prompt, user_input, temperature, max_tokens, on_token=None,
+                       response_format=None, context=None):
+        client = self.get_client()
+        started = time.perf_counter()
+        messages = build_messages(system_prompt, user_input, context)
+        if on_token is None:
+            extra = {"response_format": response_format} if response_format else {}
+            response = await client.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra
+            )
+            usage = response.usage
+            record_llm_call(time.perf_counter() - started,
+                            usage.prompt_tokens if usage else 0, usage.completion_tokens if usage else 0)
+            return response.choices[0].message.content.strip()
+
+        stream = await client.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        parts = []
+        usage = None
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+            # Groq reports usage on the last chunk under x_groq
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+        record_llm_call(time.perf_counter() - started,
+                        usage.prompt_tokens if usage else 0, usage.completion_tokens if usage else 0)
+        return "".join(parts).strip()
+
+    def stats(self) -> dict:
+        client = self.get_client()
+        return client.stats() if client else {"available": False}
+
+
+# --- Local model (llama.cpp on CPU) ---
+class _LocalRequest:
+    def __init__(self, system_prompt, user_input, temperature, max_tokens, on_token, response_format, context,
+                 loop):
+        self.system_prompt = system_prompt
+        self.user_input = user_input
+        self.context = context
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.on_token = on_token
+        self.response_format = response_format
+        self.loop = loop
+        self.future = loop.create_future()
+
+
+def _resolve(future, result):
+    if future.done():
+        return
+    if isinstance(result, Exception):
+        future.set_exception(result)
+    else:
+        future.set_result(result)
+
+
+class LocalBackend(LLMBackend):
+    """A GGUF model run on CPU with llama-cpp-python (optional dependency).
+
+    The model is not thread-safe, so one worker thread owns it and takes up
+    to `batch_size` queued requests at a time. Each batch is ordered by
+    system prompt: llama.cpp keeps the longest shared token prefix in its KV
+    cache between calls, so an agent's prompt is evaluated once per batch
+    instead of once per request. The model loads on first use.
+    """
+    name = "local"
+    hedgeable = False  # a duplicate would queue behind the original on the same CPU
+
+    def __init__(self, model_path: str = LLM_LOCAL_MODEL_PATH, n_ctx: int = LLM_LOCAL_CONTEXT,
+                 n_threads: int = LLM_LOCAL_THREADS, batch_size: int = LLM_LOCAL_BATCH_SIZE,
+                 batch_wait_ms: float = LLM_LOCAL_BATCH_WAIT_MS):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000
+        self._llama = None
+        self._load_error = None
+        self._requests = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.completed = 0
+
+    def available(self) -> bool:
+        return (bool(self.model_path) and self._load_error is None
+                and importlib.util.find_spec("llama_cpp") is not None)
+
+    async def complete(self, system_prompt, user_input, temperature, max_tokens, on_token=None,
+                       response_format=None, context=None):
+        loop = asyncio.get_running_loop()
+        request = _LocalRequest(system_prompt, user_input, temperature, max_tokens, on_token, response_format,
+                                context, loop)
+        self._start_worker()
+        started = time.perf_counter()
+        self._requests.put(request)
+        text, tokens_in, tokens_out = await request.future
+        record_llm_call(time.perf_counter() - started, tokens_in, tokens_out, backend=self.name)
+        return text.strip()
+
+    def _start_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="local-llm", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        first = self._requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                request = self._requests.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if request is None:
+                self._requests.put(None)  # finish this batch, then stop
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self.batches += 1
+            # Same system prompt back to back, so its tokens stay in the KV cache
+            batch.sort(key=lambda request: request.system_prompt)
+            for request in batch:
+                if request.future.done():  # caller timed out or was cancelled while queued
+                    continue
+                try:
+                    result = self._generate(request)
+                    self.completed += 1
+                except Exception as e:
+                    result = e
+                request.loop.call_soon_threadsafe(_resolve, request.future, result)
+
+    def _load(self):
+        if self._llama is None:
+            try:
+                from llama_cpp import Llama
+                self._llama = Llama(model_path=self.model_path, n_ctx=self.n_ctx, n_threads=self.n_threads,
+                                    verbose=False)
+                print(f"✓ Local model loaded: {self.model_path}")
+            except Exception as e:
+                self._load_error = str(e)
+                raise
+        return self._llama
+
+    def _generate(self, request: _LocalRequest):
+        llama = self._load()
+        kwargs = {
+            "messages": build_messages(request.system_prompt, request.user_input, request.context),
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+        }
+        if request.response_format:
+            kwargs["response_format"] = request.response_format
+        if request.on_token is None:
+            response = llama.create_chat_completion(**kwargs)
+            usage = response.get("usage") or {}
+            return (response["choices"][0]["message"]["content"] or "",
+                    usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+
+        parts = []
+        for chunk in llama.create_chat_completion(stream=True, **kwargs):
+            delta = chunk["choices"][0]["delta"].get("content")
+            if delta:
+                parts.append(delta)
+                request.loop.call_soon_threadsafe(request.on_token, delta)
+        prompt = "".join(message["content"] for message in kwargs["messages"])
+        prompt_tokens = len(llama.tokenize(prompt.encode("utf-8")))
+        return "".join(parts), prompt_tokens, len(parts)
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available(),
+            "model_path": self.model_path,
+            "loaded": self._llama is not None,
+            "load_error": self._load_error,
+            "queued": self._requests.qsize(),
+            "batches": self.batches,
+            "completed": self.completed,
+        }
+
+    async def aclose(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._requests.put(None)
+            await asyncio.to_thread(self._thread.join, 5)
+        self._thread = None
+        self._llama = None
+
+
+# --- Deterministic mock ---
+class MockBackend(LLMBackend):
+    """Offline replies that depend only on the prompt and input, for tests and benchmarks.
+
+    Agent prompts are answered from that agent's fallback pool, picked by a
+    hash of the input, so the same request always gets the same plan.
+    """
+    name = "mock"
+
+    def __init__(self, delay: float = LLM_MOCK_DELAY_SECONDS):
+        from .registry import AGENT_REGISTRY
+
+        self.delay = delay
+        self.calls = 0
+        self._pools_by_prompt = {spec.system_prompt: spec.fallback_responses for spec in AGENT_REGISTRY.values()}
+        self._pools_by_key = {spec.key: spec.fallback_responses for spec in AGENT_REGISTRY.values()}
+
+    @staticmethod
+    def _pick(pool, *parts) -> str:
+        digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).digest()
+        return pool[int.from_bytes(digest[:4], "big") % len(pool)]
+
+    def reply(self, system_prompt: str, user_input: str, response_format: dict = None) -> str:
+        if response_format and response_format.get("type") == "json_object":
+            # Fused prompts name their fields as ### "<key>" agent
+            keys = re.findall(r'### "(\w+)" agent', system_prompt)
+            return json.dumps({
+                key: self._pick(self._pools_by_key.get(key, [f"Mock {key} reply."]), key, user_input)
+                for key in keys
+            })
+        pool = self._pools_by_prompt.get(system_prompt)
+        if pool is None:
+            return f"Mock reply to: {user_input[:80]}"
+        return self._pick(pool, system_prompt, user_input)
+
+    async def complete(self, system_prompt, user_input, temperature, max_tokens, on_token=None,
+                       response_format=None, context=None):
+        started = time.perf_counter()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.calls += 1
+        text = self.reply(system_prompt, user_input, response_format)
+        if on_token is not None:
+            for word in re.findall(r"\S+\s*", text):
+                on_token(word)
+        # Same rough 4-characters-per-token estimate as the stub LLM server
+        prompt_chars = len(system_prompt) + len(user_input) + len(context or "")
+        record_llm_call(time.perf_counter() - started, prompt_chars // 4, len(text) // 4, backend=self.name)
+        return text
+
+    def stats(self) -> dict:
+        return {"available": True, "calls": self.calls, "delay": self.delay}
+
+
+def build_backends(names, get_groq_client, groq_model: str) -> list:
+    """Backends for LLM_BACKENDS, in routing order. Unknown names are skipped with a warning."""
+    factories = {
+        "groq": lambda: GroqBackend(get_groq_client, groq_model),
+        "local": LocalBackend,
+        "mock": MockBackend,
+    }
+    backends = []
+    for name in names:
+        if name not in factories:
+            print(f"⚠️ Unknown LLM backend '{name}', expected one of {sorted(factories)}")
+            continue
+        backends.append(factories[name]())
+    return backends
@@ -0,0 +1,202 @@
+import asyncio
+import random
+import time
+
+import groq
+import httpx
+from groq import AsyncGroq
+
+from .config import (
+    LLM_POOL_SIZE, LLM_POOL_KEEPALIVE, LLM_KEEPALIVE_SECONDS, LLM_REQUEST_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES, LLM_BACKOFF_BASE_SECONDS, LLM_BACKOFF_MAX_SECONDS,
+    LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS,
+    LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_BURST,
+)
+from .llm_backends import llm_deadline
+
+# Errors worth retrying: rate limits, provider 5xx, timeouts and dropped connections
+RETRYABLE_ERRORS = (
+    groq.RateLimitError,
+    groq.InternalServerError,
+    groq.APITimeoutError,
+    groq.APIConnectionError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets one trial call through after `reset_seconds`."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half-open" and self._trial_in_flight):
+            raise CircuitOpenError(f"circuit open after {self.failures} consecutive failures")
+        if state == "half-open":
+            self._trial_in_flight = True
+
+    def release_trial(self):
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class RateLimitWaitTooLong(Exception):
+    """Raised instead of waiting for a rate-limit token that would arrive after the caller's deadline."""
+
+
+class TokenBucket:
+    """Per-process rate limiter: `rate_per_minute` calls refilled continuously, up to `burst` at once."""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+
+    async def acquire(self, deadline: float = None) -> float:
+        """Waits for a token; returns how long the caller had to wait.
+
+        The token is reserved up front (the balance goes negative while callers
+        queue), so later callers know their wait at once. If that wait would end
+        after `deadline` (time.monotonic()), raises RateLimitWaitTooLong without
+        taking a token, so calls nobody will wait for never reach the provider.
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if deadline is not None and now + wait > deadline:
+            raise RateLimitWaitTooLong(f"next rate-limit token in {wait:.1f}s, caller gives up in "
+                                       f"{max(0.0, deadline - now):.1f}s")
+        self.tokens -= 1
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.tokens += 1  # hand the reservation back
+                raise
+        return wait
+
+
+def _retry_after_seconds(error) -> float:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMClient:
+    """Shared Groq client: pooled keep-alive connections, jittered retries, circuit breaker and rate limit."""
+
+    def __init__(self, api_key: str = None, client=None):
+        if client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_POOL_SIZE,
+                    max_keepalive_connections=LLM_POOL_KEEPALIVE,
+                    keepalive_expiry=LLM_KEEPALIVE_SECONDS,
+                ),
+                timeout=LLM_REQUEST_TIMEOUT_SECONDS,
+            )
+            # Retries are handled here, so the SDK's own retry loop is switched off
+            client = AsyncGroq(api_key=api_key, http_client=http_client, max_retries=0)
+        self.client = client
+        self.breaker = CircuitBreaker(LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS)
+        self.rate_limiter = TokenBucket(LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_BURST)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.rate_limited = 0
+        self.rate_limit_wait_seconds = 0.0
+
+    async def create(self, **kwargs):
+        """chat.completions.create with retries; raises CircuitOpenError while the provider is down."""
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.short_circuited += 1
+            raise
+
+        try:
+            response = await self._create_with_retries(**kwargs)
+        except RETRYABLE_ERRORS:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            self.breaker.release_trial()
+        self.breaker.record_success()
+        return response
+
+    async def _create_with_retries(self, **kwargs):
+        attempt = 0
+        deadline = llm_deadline.get()
+        while True:
+            try:
+                self.rate_limit_wait_seconds += await self.rate_limiter.acquire(deadline)
+            except RateLimitWaitTooLong:
+                self.rate_limited += 1
+                raise
+            self.calls += 1
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                # Full jitter, unless the provider told us how long to wait
+                delay = random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+                retry_after = _retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = retry_after
+                if attempt >= LLM_MAX_RETRIES or delay > LLM_BACKOFF_MAX_SECONDS:
+                    raise
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    raise  # the caller will have given up before the retry could start
+                attempt += 1
+                self.retries += 1
+                print(f"DEBUG: LLM call failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "rate_limited": self.rate_limited,
+            "circuit_state": self.breaker.state,
+            "rate_limit_wait_seconds": round(self.rate_limit_wait_seconds, 3),
+        }
@@ -1,7 +1,69 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Union
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from .admission import AdmissionRejected, admission
+from .cache import cache_bypass, response_cache
+from .config import (
+    RETRY_AFTER_SECONDS, BATCH_MAX_ITEMS, GRACEFUL_SHUTDOWN_SECONDS, JOBS_MAX_WAIT_SECONDS, JOBS_POLL_SECONDS,
+    WARMUP_PRIME,
+)
+from .jobs import FINISHED, JobQueueFull, job_queue, job_view, job_workers
+from .metrics import QUEUE_WAIT, REQUESTS_REJECTED, RequestTrace, current_trace, render_metrics
+from .registry import AGENT_REGISTRY
+from .responses import FastJSONResponse, PlanResponse, render_plan
+from .schemas import CompactRecoveryPlan, RecoveryPlan, UserInput
+
+shutdown_started_at = None
+
+def watch_shutdown_signals():
+    """Chains uvicorn's SIGINT/SIGTERM handlers so job workers stop taking jobs as soon as shutdown starts.
+
+    Uvicorn drains in-flight requests (for up to its timeout_graceful_shutdown)
+    before the lifespan shutdown runs; this lets jobs drain in the same window.
+    Must run during lifespan startup, while uvicorn's handlers are installed.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
 
-app = FastAPI(title="Breakup Recovery AI Agent", version="1.0.0")
+        def handler(signum, frame, previous=previous):
+            global shutdown_started_at
+            if shutdown_started_at is None:
+                shutdown_started_at = time.monotonic()
+                loop.call_soon_threadsafe(job_workers.stop_taking)
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: pay for the agents import and LLM client setup here, not in the first request
+    from .agents import close_llm_client, warm_up
+    app.state.warmup = await warm_up(prime=WARMUP_PRIME)
+    job_workers.start()
+    watch_shutdown_signals()
+    yield
+    # Shutdown: uvicorn has already waited for in-flight requests, so only running jobs
+    # are left; they get what remains of the grace period, then LLM connections close
+    elapsed = time.monotonic() - shutdown_started_at if shutdown_started_at is not None else 0.0
+    await job_workers.stop(max(0.0, GRACEFUL_SHUTDOWN_SECONDS - elapsed))
+    await close_llm_client()
+
+app = FastAPI(title="Breakup Recovery AI Agent", version="1.0.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -12,13 +74,67 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+async def admit_request(request: Request):
+    """Holds an admission slot for the duration of the request, or rejects with 503.
+
+    Also starts the request's metrics trace, which agents add their timings to.
+    """
+    route = request.url.path
+    trace = RequestTrace(route)
+    current_trace.set(trace)
+    try:
+        async with admission.slot():
+            trace.queue_wait = time.perf_counter() - trace.started
+            QUEUE_WAIT.observe(trace.queue_wait, route=route)
+            try:
+                yield
+            finally:
+                trace.finish()
+    except AdmissionRejected as e:
+        REQUESTS_REJECTED.inc(route=route)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy ({e}), please retry shortly.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+def check_sessions(user_inputs):
+    """404 for a session_id that POST /sessions did not issue, or that has expired."""
+    from .sessions import session_store
+    for user_input in user_inputs:
+        if user_input.session_id and session_store.get(user_input.session_id) is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired session, create one with POST /sessions")
+
+async def read_cache_bypass(
+    x_cache_bypass: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
+    """`X-Cache-Bypass: 1` or `Cache-Control: no-cache` skips cached LLM answers for this request."""
+    bypass = (x_cache_bypass or "").lower() in ("1", "true", "yes") or "no-cache" in (cache_control or "").lower()
+    cache_bypass.set(bypass)
+
 @app.get("/")
 def read_root():
     return {
         "message": "Breakup Recovery AI Agent API",
         "endpoints": {
             "GET /": "This info page",
-            "POST /run_agents": "Run all 4 AI agents with user input",
+            "POST /run_agents": "Run all 4 AI agents (or the subset in \"agents\") with user input "
+                                "(?compact=true leaves out the summary and roles)",
+            "POST /run_agents/stream": "Same as /run_agents, streamed as Server-Sent Events",
+            "POST /run_agents/batch": "Run the agents for a list of inputs (?stream=true for JSON Lines)",
+            "POST /jobs": "Queue a /run_agents request (?priority=N, higher first); returns a job id",
+            "GET /jobs": "Job queue counts by status",
+            "GET /jobs/{job_id}": "Job status and RecoveryPlan (?wait=seconds to long-poll)",
+            "GET /jobs/{job_id}/stream": "Job status changes and result as Server-Sent Events",
+            "GET /agents": "Each agent's key, name, role and summary line",
+            "POST /sessions": "Start a conversation; pass the returned session_id with follow-up messages",
+            "GET /sessions/{session_id}": "What the agents remember about a session",
+            "DELETE /sessions/{session_id}": "Forget a session",
+            "GET /cache/stats": "LLM response cache hit/miss/eviction counters",
+            "GET /llm/stats": "LLM client retry, circuit breaker and rate limit counters, per-backend and hedging stats",
+            "GET /metrics": "Prometheus metrics: request, agent and LLM latency, tokens, fallbacks",
+            "GET /health": "Health check, with this worker's startup warmup details",
             "GET /docs": "Interactive API documentation"
         },
         "agents": [
@@ -29,26 +145,222 @@ def read_root():
         ]
     }
 
-@app.post("/run_agents")
-def run_agents(user_input: dict):
+# The plan routes return prebuilt responses, so these only document them in OpenAPI
+PLAN_RESPONSES = {200: {
+    "model": Union[RecoveryPlan, CompactRecoveryPlan],
+    "description": "A RecoveryPlan, or a CompactRecoveryPlan with ?compact=true",
+}}
+PLAN_LINE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "index": {"type": "integer"},
+        "plan": {"anyOf": [{"$ref": "#/components/schemas/RecoveryPlan"},
+                           {"$ref": "#/components/schemas/CompactRecoveryPlan"}]},
+    },
+    "required": ["index", "plan"],
+}
+BATCH_RESPONSES = {200: {
+    "model": Union[List[RecoveryPlan], List[CompactRecoveryPlan]],
+    "description": "Plans in input order; with ?stream=true, one JSON object per line in completion order",
+    "content": {"application/x-ndjson": {"schema": PLAN_LINE_SCHEMA}},
+}}
+
+@app.post("/run_agents", responses=PLAN_RESPONSES)
+async def run_agents(
+    user_input: UserInput,
+    compact: bool = False,
+    _slot=Depends(admit_request),
+    _cache=Depends(read_cache_bypass),
+):
     """
-    Run all four AI agents with the user's feelings description.
+    Run all four AI agents concurrently with the user's feelings description.
+    Pass `agents` to run only some of them (therapist, closure, routine, honesty).
+    With `?compact=true` the plan leaves out `summary` and each agent's `role`
+    (both are fixed per agent, see GET /agents).
     
     Example request:
     ```json
     {
-        "feelings_description": "I just broke up and feel completely lost"
+        "feelings_description": "I just broke up and feel completely lost",
+        "agents": ["therapist", "routine"]
     }
     ```
     """
     # Import here to avoid circular imports
     from .agents import run_multi_agent_stub
-    from .schemas import UserInput
-    
-    # Convert dict to UserInput
-    user_input_obj = UserInput(**user_input)
-    return run_multi_agent_stub(user_input_obj)
+
+    check_sessions([user_input])
+    return PlanResponse(await run_multi_agent_stub(user_input), compact=compact)
+
+@app.post("/run_agents/stream")
+async def run_agents_stream(user_input: UserInput, _slot=Depends(admit_request), _cache=Depends(read_cache_bypass)):
+    """
+    Streaming variant of /run_agents using Server-Sent Events.
+
+    Emits `token` events while agents generate, one `agent` event per agent
+    as soon as it finishes, and a final `summary` event.
+    """
+    from .agents import stream_multi_agent
+
+    check_sessions([user_input])
+
+    async def event_stream():
+        async for event, data in stream_multi_agent(user_input):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/run_agents/batch", responses=BATCH_RESPONSES)
+async def run_agents_batch(
+    user_inputs: List[UserInput],
+    stream: bool = False,
+    compact: bool = False,
+    _slot=Depends(admit_request),
+    _cache=Depends(read_cache_bypass),
+):
+    """
+    Run the agents for many feelings descriptions in one call.
+
+    Returns a list of RecoveryPlan objects in input order. With `?stream=true`
+    the response is JSON Lines instead, one `{"index": i, "plan": {...}}` per
+    line in completion order. `?compact=true` works as for /run_agents.
+    """
+    from .agents import run_multi_agent_batch
+
+    if len(user_inputs) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large, at most {BATCH_MAX_ITEMS} inputs per call.")
+    check_sessions(user_inputs)
+
+    if stream:
+        async def jsonl_stream():
+            async for index, plan in run_multi_agent_batch(user_inputs):
+                yield b'{"index":%d,"plan":' % index + render_plan(plan, compact) + b"}\n"
+
+        return StreamingResponse(jsonl_stream(), media_type="application/x-ndjson")
+
+    plans = [None] * len(user_inputs)
+    async for index, plan in run_multi_agent_batch(user_inputs):
+        plans[index] = plan
+    return PlanResponse(plans, compact=compact)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(user_input: UserInput, priority: int = 0):
+    """
+    Queue the same input /run_agents takes and return at once with a job id.
+
+    Background workers run queued jobs, highest priority first, so bursts
+    wait in the queue instead of holding connections open.
+    """
+    check_sessions([user_input])
+    try:
+        job = await job_queue.put(user_input.model_dump_json(), priority)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Job queue full ({e}), please retry shortly.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    return FastJSONResponse(job_view(job), status_code=202, headers={"Location": f"/jobs/{job['job_id']}"})
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Job status, with the RecoveryPlan under `result` once done. `wait` long-polls until it finishes."""
+    job = await job_queue.wait(job_id, min(max(wait, 0), JOBS_MAX_WAIT_SECONDS))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job_view(job)
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    """
+    Server-Sent Events for one job: a `status` event whenever it changes,
+    then a final `result` event with the job (plan or error).
+    """
+    job = await job_queue.fetch(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+
+    async def event_stream():
+        current, last_status = job, None
+        while current is not None:
+            if current["status"] in FINISHED:
+                yield f"event: result\ndata: {json.dumps(job_view(current))}\n\n"
+                return
+            if current["status"] != last_status:
+                last_status = current["status"]
+                yield f"event: status\ndata: {json.dumps({'job_id': job_id, 'status': last_status})}\n\n"
+            current = await job_queue.wait(job_id, JOBS_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/jobs")
+def jobs_stats():
+    return job_queue.stats()
+
+@app.get("/agents")
+def list_agents():
+    """The fixed text behind each agent, for clients that ask for compact plans."""
+    return [
+        {"key": spec.key, "agent_name": spec.agent_name, "role": spec.role, "summary_line": spec.summary_line}
+        for spec in AGENT_REGISTRY.values()
+    ]
+
+# Async so the session store is only ever touched from the event loop
+@app.post("/sessions")
+async def create_session():
+    """Starts a session. Pass its id as `session_id` so agents remember earlier messages."""
+    from .sessions import session_store
+    return {"session_id": session_store.create()}
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    from .sessions import session_store
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return {"session_id": session_id, "turns": session.turns, "context": session.context()}
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    from .sessions import session_store
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return {"deleted": session_id}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return response_cache.stats()
+
+@app.get("/llm/stats")
+def llm_stats():
+    from . import agents
+    from .hedging import hedger
+    # Only a client some backend already built: creating one here would import the Groq SDK for nothing
+    llm_client = agents.llm_client
+    stats = llm_client.stats() if llm_client else {"mode": "mock"}
+    stats["backends"] = {backend.name: backend.stats() for backend in agents.get_llm_backends()}
+    stats["hedging"] = hedger.stats()
+    return stats
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Make sure the agents module (and its LLM client gauge) is loaded before the first scrape
+    from . import agents  # noqa: F401
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy", "service": "breakup-recovery-agent"}
\ No newline at end of file
+def health_check(request: Request):
+    """Uvicorn finishes the lifespan startup (warmup included) before it accepts connections, so any answer means ready."""
+    return {
+        "status": "healthy",
+        "service": "breakup-recovery-agent",
+        "warmup": getattr(request.app.state, "warmup", None),
+    }
\ No newline at end of file
@@ -0,0 +1,170 @@
+import json
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from .config import SLOW_REQUEST_SECONDS
+
+# Seconds; LLM calls run from ~100ms to the agent timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 25.0, 60.0)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        series = self.series.setdefault(key, [0] * (len(self.buckets) + 2))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Value read at scrape time from a callback returning {label value tuple: number}."""
+
+    def __init__(self, name: str, help_text: str, callback, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.callback().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+REGISTRY = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_LATENCY = register(Histogram(
+    "recovery_request_duration_seconds", "End-to-end agent request latency.", ["route"]))
+QUEUE_WAIT = register(Histogram(
+    "recovery_admission_wait_seconds", "Time a request waited for an admission slot.", ["route"]))
+REQUESTS_REJECTED = register(Counter(
+    "recovery_requests_rejected_total", "Requests turned away with 503 by admission control.", ["route"]))
+AGENT_LATENCY = register(Histogram(
+    "recovery_agent_duration_seconds", "Time for one agent to produce advice, fallbacks included.", ["agent"]))
+LLM_LATENCY = register(Histogram(
+    "recovery_llm_call_duration_seconds", "Latency of LLM calls that reached a backend.", ["agent", "backend"]))
+LLM_TOKENS = register(Counter(
+    "recovery_llm_tokens_total", "Tokens sent to and received from the LLM.", ["agent", "backend", "direction"]))
+FALLBACKS = register(Counter(
+    "recovery_agent_fallbacks_total", "Canned fallback responses served instead of LLM output.", ["agent", "reason"]))
+
+
+# --- Per-request trace ---
+class RequestTrace:
+    """Timing for one HTTP request: admission wait plus what each agent spent."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.started = time.perf_counter()
+        self.queue_wait = 0.0
+        self.agents = {}
+
+    def agent(self, name: str) -> dict:
+        return self.agents.setdefault(
+            name, {"latency": 0.0, "llm_latency": 0.0, "tokens_in": 0, "tokens_out": 0, "fallback": None})
+
+    def finish(self):
+        duration = time.perf_counter() - self.started
+        REQUEST_LATENCY.observe(duration, route=self.route)
+        if SLOW_REQUEST_SECONDS and duration >= SLOW_REQUEST_SECONDS:
+            print("SLOW REQUEST " + json.dumps({
+                "route": self.route,
+                "duration": round(duration, 3),
+                "queue_wait": round(self.queue_wait, 3),
+                "agents": {name: {k: round(v, 3) if isinstance(v, float) else v for k, v in data.items()}
+                           for name, data in self.agents.items()},
+            }))
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+# Which agent the LLM call running in this task belongs to (each agent runs in its own task)
+current_agent: ContextVar[str] = ContextVar("current_agent", default="unknown")
+
+
+def record_llm_call(latency: float, tokens_in: int, tokens_out: int, backend: str = "groq"):
+    agent = current_agent.get()
+    LLM_LATENCY.observe(latency, agent=agent, backend=backend)
+    LLM_TOKENS.inc(tokens_in, agent=agent, backend=backend, direction="in")
+    LLM_TOKENS.inc(tokens_out, agent=agent, backend=backend, direction="out")
+    trace = current_trace.get()
+    if trace is not None:
+        entry = trace.agent(agent)
+        entry["llm_latency"] += latency
+        entry["tokens_in"] += tokens_in
+        entry["tokens_out"] += tokens_out
+
+
+def record_agent(agent: str, latency: float):
+    AGENT_LATENCY.observe(latency, agent=agent)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.agent(agent)["latency"] = latency
+
+
+def record_fallback(reason: str, agent: str = None):
+    agent = agent or current_agent.get()
+    FALLBACKS.inc(agent=agent, reason=reason)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.agent(agent)["fallback"] = reason
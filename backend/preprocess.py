@@ -0,0 +1,155 @@
+import math
+import re
+from collections import Counter as WordCounter
+from functools import lru_cache
+
+from .config import INPUT_MODE, INPUT_MAX_TOKENS, AGENT_TOKEN_BUDGET, INPUT_MIN_TOKENS
+from .metrics import Counter, register
+
+INPUT_TOKENS = register(Counter(
+    "recovery_input_tokens_total", "Approximate user-text tokens received, and sent to the agents after trimming.",
+    ["stage"]))
+INPUTS_TRIMMED = register(Counter(
+    "recovery_inputs_trimmed_total", "User texts cut down to fit the token budget.", ["method"]))
+
+# Words, runs of digits and single punctuation marks, roughly how a BPE tokenizer splits English
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from had has have he her him his i i'm im in is it its just me my "
+    "of on or our she so that the their them then there they this to too up was we were what when with "
+    "you your".split()
+)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapses runs of spaces and tabs, keeps at most one blank line between paragraphs."""
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def count_tokens(text: str) -> int:
+    """Approximate Llama-style token count: about one token per 4 letters of a word, one per symbol."""
+    return sum(math.ceil(len(piece) / 4) if piece[0].isalnum() else 1 for piece in _PIECES.findall(text))
+
+
+@lru_cache(maxsize=64)
+def _prompt_tokens(system_prompt: str) -> int:
+    return count_tokens(system_prompt)
+
+
+def input_budget(specs, context: str = None) -> int:
+    """User-text tokens that keep every selected agent's call within AGENT_TOKEN_BUDGET.
+
+    Each call costs its system prompt + any session context + the user text +
+    up to max_tokens of reply, so the text gets what the hungriest agent
+    leaves over, capped at INPUT_MAX_TOKENS and never below INPUT_MIN_TOKENS.
+    """
+    overhead = max(_prompt_tokens(spec.system_prompt) + spec.max_tokens for spec in specs)
+    if context:
+        overhead += count_tokens(context)
+    return max(INPUT_MIN_TOKENS, min(INPUT_MAX_TOKENS, AGENT_TOKEN_BUDGET - overhead))
+
+
+_ELLIPSIS = " ..."
+
+
+def truncate(text: str, budget: int) -> str:
+    """Keeps the opening of the text up to `budget` tokens, cutting inside a word if one is too long.
+
+    Long unbroken runs (CJK text, URLs, pasted IDs) are cut by pieces and then
+    by characters, so they are shortened rather than dropped.
+    """
+    room = budget - count_tokens(_ELLIPSIS)
+    kept, used = [], 0
+    for part in re.split(r"(\s+)", text):
+        cost = count_tokens(part)
+        if used + cost <= room:
+            kept.append(part)
+            used += cost
+            continue
+        for piece in _PIECES.findall(part):
+            cost = count_tokens(piece)
+            if used + cost > room:
+                if piece[0].isalnum():
+                    kept.append(piece[:(room - used) * 4])
+                break
+            kept.append(piece)
+            used += cost
+        break
+    result = "".join(kept).rstrip()
+    # Re-joined pieces can count differently; make sure the result really fits
+    while result and count_tokens(result + _ELLIPSIS) > budget:
+        result = result[:-1].rstrip()
+    return result + _ELLIPSIS
+
+
+def summarize(text: str, budget: int) -> str:
+    """Extractive summary: the opening sentence plus the most content-heavy others, in original order.
+
+    Sentences are scored by how often their non-stopwords appear across the
+    whole text, so the recurring themes of a long entry survive.
+    """
+    # Repeated sentences only need to be said once
+    sentences = list({s.strip().lower(): s.strip() for s in _SENTENCES.split(text.replace("\n", " "))
+                      if s.strip()}.values())
+    if len(sentences) < 2:
+        return truncate(text, budget)
+    words = [w.lower() for s in sentences for w in re.findall(r"[A-Za-z']+", s)]
+    frequency = WordCounter(w for w in words if w not in _STOPWORDS)
+
+    def score(sentence):
+        terms = [w.lower() for w in re.findall(r"[A-Za-z']+", sentence) if w.lower() not in _STOPWORDS]
+        return sum(frequency[w] for w in terms) / (len(terms) + 1)
+
+    ranked = sorted(range(1, len(sentences)), key=lambda i: score(sentences[i]), reverse=True)
+    chosen, used = set(), 0
+    for index in [0, *ranked]:
+        cost = count_tokens(sentences[index])
+        if used + cost <= budget:
+            chosen.add(index)
+            used += cost
+    if not chosen:
+        return truncate(sentences[0], budget)
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+class PreparedInput:
+    """The user text as every agent in a plan will see it, with its token accounting."""
+
+    __slots__ = ("text", "original_tokens", "tokens", "budget", "method")
+
+    def __init__(self, text: str, original_tokens: int, tokens: int, budget: int, method: str):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.tokens = tokens
+        self.budget = budget
+        self.method = method  # "none", "truncate" or "summarize"
+
+    def predicted_tokens(self, specs, context: str = None) -> int:
+        """Upper bound on tokens (in + out) for running every spec on this input."""
+        context_tokens = count_tokens(context) if context else 0
+        return sum(_prompt_tokens(spec.system_prompt) + context_tokens + self.tokens + spec.max_tokens
+                   for spec in specs)
+
+
+def prepare_input(text: str, specs, context: str = None) -> PreparedInput:
+    """Runs once per plan: normalizes whitespace and fits the text to the agents' token budget."""
+    if INPUT_MODE == "off":
+        tokens = count_tokens(text)
+        return PreparedInput(text, tokens, tokens, tokens, "none")
+
+    text = normalize_whitespace(text)
+    original_tokens = count_tokens(text)
+    budget = input_budget(specs, context)
+    method = "none"
+    if original_tokens > budget:
+        method = INPUT_MODE
+        text = summarize(text, budget) if INPUT_MODE == "summarize" else truncate(text, budget)
+        INPUTS_TRIMMED.inc(method=method)
+        print(f"✂️ Input trimmed from ~{original_tokens} to ~{count_tokens(text)} tokens ({method})")
+    prepared = PreparedInput(text, original_tokens, count_tokens(text), budget, method)
+    INPUT_TOKENS.inc(original_tokens, stage="received")
+    INPUT_TOKENS.inc(prepared.tokens, stage="sent")
+    return prepared
@@ -0,0 +1,140 @@
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+# --- AGENT PROMPTS (keep same) ---
+THERAPIST_SYSTEM_PROMPT = """You are the Therapist Agent, Dr. Empathy. Your role is to provide compassionate, empathetic, and professional support to a user recovering from a painful breakup.
+Your response must be kind, validating, hopeful, and strictly under 100 words.
+Structure your response into an acknowledgement and one concrete, healthy piece of self-care advice for today.
+DO NOT talk about the other agents or give advice related to finding a new relationship."""
+
+CLOSURE_AGENT_SYSTEM_PROMPT = """You are the 'Closure Agent,' specialized in providing a cathartic emotional outlet for a user going through a breakup.
+Your single goal is to write the raw, emotional, often irrational message that the user desperately WANTS to send to their ex, but should NOT send.
+RULES:
+1. Strictly use the first person ("I"): The output must sound like it came directly from the user's deepest pain and longing.
+2. Be intensely emotional and cathartic: Focus on regret, anger, sadness, confusion, and raw longing.
+3. DO NOT provide advice, coping strategies, or support. Your entire output must be the message draft itself.
+4. Format the message clearly with a short, emotional introduction (e.g., 'A Message Draft for Emotional Release:') followed by the raw text."""
+
+ROUTINE_PLANNER_SYSTEM_PROMPT = """You are the Routine Planner Agent. Create a simple, manageable daily recovery routine for someone going through a breakup.
+Focus on:
+1. Morning: One self-reflection activity (5-10 minutes)
+2. Afternoon: One social/connection activity
+3. Evening: One healthy distraction/self-care activity
+Keep it practical, gentle, and under 80 words."""
+
+BRUTAL_HONESTY_SYSTEM_PROMPT = """You are the Brutal Honesty Agent. Provide direct, objective, no-nonsense insights about the breakup situation.
+Be factual, logical, and straightforward. Point out patterns or truths the user might be avoiding.
+Do NOT be cruel - be honest but constructive. Keep it under 80 words."""
+
+# --- Fallback pools (used when the LLM is unavailable) ---
+THERAPIST_FALLBACKS = [
+    "I hear the pain in your words. Remember to practice self-compassion today - you're doing the best you can.",
+    "Your feelings are completely valid. Try the box breathing technique: inhale 4s, hold 4s, exhale 4s, hold 4s.",
+    "Breakups shake our foundation. Today, focus on one small act of kindness toward yourself.",
+    "It's okay to feel overwhelmed. Consider writing down three things you're grateful for today."
+]
+
+CLOSURE_FALLBACKS = [
+    "A Message Draft for Emotional Release: I'm writing this because I need to say it somewhere, even though I know sending it wouldn't help either of us...",
+    "A Message Draft for Emotional Release: There's this ache in my chest filled with all the words I can't say to you anymore...",
+    "A Message Draft for Emotional Release: This page holds what my phone shouldn't - every raw, unfiltered thought I need to release but shouldn't share..."
+]
+
+ROUTINE_FALLBACKS = [
+    "Morning: Write 3 things you're grateful for. Afternoon: Text one friend. Evening: Watch a comedy show for 30 minutes.",
+    "Morning: 5-minute meditation. Afternoon: Walk outside for 15 minutes. Evening: Cook a healthy meal.",
+    "Morning: Journal about one emotion. Afternoon: Call family member. Evening: Read a book chapter."
+]
+
+HONESTY_FALLBACKS = [
+    "The relationship served its purpose. Holding on to 'what ifs' prevents you from seeing new possibilities.",
+    "Focus on the patterns, not the person. What did this relationship teach you about your needs?",
+    "Romanticizing the past keeps you stuck. The incompatibilities were real and important."
+]
+
+# --- Agent Registry ---
+@dataclass(frozen=True)
+class AgentSpec:
+    """Everything needed to run one agent: prompt, sampling params, fallbacks and display text."""
+    key: str
+    agent_name: str
+    role: str
+    system_prompt: str
+    temperature: float
+    max_tokens: int
+    fallback_responses: List[str]
+    summary_line: str  # what the user gets from this agent, for the plan summary
+
+    def fallback(self) -> str:
+        return random.choice(self.fallback_responses)
+
+# In the order agents appear in a plan
+AGENT_REGISTRY = {spec.key: spec for spec in [
+    AgentSpec(
+        key="therapist",
+        agent_name="Therapist Agent",
+        role="Empathetic support and coping strategies.",
+        system_prompt=THERAPIST_SYSTEM_PROMPT,
+        temperature=0.7,
+        max_tokens=150,
+        fallback_responses=THERAPIST_FALLBACKS,
+        summary_line="Emotional validation and coping strategies",
+    ),
+    AgentSpec(
+        key="closure",
+        agent_name="Closure Agent",
+        role="Generates emotional messages you shouldn't send (for catharsis).",
+        system_prompt=CLOSURE_AGENT_SYSTEM_PROMPT,
+        temperature=0.8,
+        max_tokens=150,
+        fallback_responses=CLOSURE_FALLBACKS,
+        summary_line="A cathartic message draft for release",
+    ),
+    AgentSpec(
+        key="routine",
+        agent_name="Routine Planner Agent",
+        role="Suggests daily routine and healthy distractions.",
+        system_prompt=ROUTINE_PLANNER_SYSTEM_PROMPT,
+        temperature=0.6,
+        max_tokens=120,
+        fallback_responses=ROUTINE_FALLBACKS,
+        summary_line="A practical daily recovery routine",
+    ),
+    AgentSpec(
+        key="honesty",
+        agent_name="Brutal Honesty Agent",
+        role="Provides direct, no-nonsense feedback.",
+        system_prompt=BRUTAL_HONESTY_SYSTEM_PROMPT,
+        temperature=0.5,
+        max_tokens=100,
+        fallback_responses=HONESTY_FALLBACKS,
+        summary_line="Objective insights about the situation",
+    ),
+]}
+
+AGENT_KEYS = tuple(AGENT_REGISTRY)
+
+def resolve_agents(keys: Optional[List[str]] = None) -> List[AgentSpec]:
+    """Specs for the requested agent keys in plan order; all agents when keys is None."""
+    if keys is None:
+        return list(AGENT_REGISTRY.values())
+    return [spec for spec in AGENT_REGISTRY.values() if spec.key in keys]
+
+_SUMMARY_COUNTS = {1: "Your selected AI agent has", 2: "Both selected AI agents have",
+                   3: "All three selected AI agents have", 4: "All four AI agents have"}
+
+def plan_summary(specs: List[AgentSpec]) -> str:
+    return _plan_summary(tuple(spec.key for spec in specs))
+
+@lru_cache(maxsize=None)
+def _plan_summary(keys: tuple) -> str:
+    # At most one string per agent subset, built on first use
+    specs = [AGENT_REGISTRY[key] for key in keys]
+    lines = ", ".join(f"{i}) {spec.summary_line}" for i, spec in enumerate(specs, 1))
+    return (
+        f"{_SUMMARY_COUNTS.get(len(specs), f'All {len(specs)} AI agents have')} analyzed your situation. "
+        f"You received: {lines}. "
+        "Remember, healing takes time - be gentle with yourself."
+    )
@@ -0,0 +1,48 @@
+import json
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson  # optional: pip install orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(content) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Compact UTF-8 JSON, with orjson when it is installed
+dumps = orjson.dumps if orjson is not None else _json_dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (falls back to the stdlib json module)."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# --- Plans ---
+# ?compact=true leaves out what is the same for every plan with the same agents (see GET /agents)
+COMPACT_EXCLUDE = {"summary": True, "agents": {"__all__": {"role"}}}
+
+
+def render_plan(plan, compact: bool = False) -> bytes:
+    """A RecoveryPlan as JSON bytes, in the CompactRecoveryPlan shape when `compact`."""
+    return plan.model_dump_json(exclude=COMPACT_EXCLUDE if compact else None).encode("utf-8")
+
+
+class PlanResponse(Response):
+    """Response for one RecoveryPlan or a list of them, serialized by pydantic (no jsonable_encoder pass)."""
+
+    media_type = "application/json"
+
+    def __init__(self, plan, compact: bool = False, **kwargs):
+        self.compact = compact
+        super().__init__(plan, **kwargs)
+
+    def render(self, content) -> bytes:
+        if isinstance(content, list):
+            return b"[" + b",".join(render_plan(plan, self.compact) for plan in content) + b"]"
+        return render_plan(content, self.compact)
@@ -1,5 +1,8 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+
+from .registry import AGENT_KEYS
+from .sessions import SESSION_ID_PATTERN
 
 class AgentResponse(BaseModel):
     agent_name: str
@@ -8,7 +11,33 @@ class AgentResponse(BaseModel):
 
 class UserInput(BaseModel):
     feelings_description: str
+    agents: Optional[List[str]] = None  # subset of registry keys to run; all agents when omitted
+    # Continue a conversation: agents get a summary of this session's earlier messages
+    session_id: Optional[str] = Field(None, pattern=SESSION_ID_PATTERN)
+
+    @field_validator("agents")
+    @classmethod
+    def check_agents(cls, agents):
+        if agents is None:
+            return None
+        keys = list(dict.fromkeys(agent.strip().lower() for agent in agents))
+        unknown = [key for key in keys if key not in AGENT_KEYS]
+        if unknown:
+            raise ValueError(f"unknown agents {unknown}, choose from {list(AGENT_KEYS)}")
+        if not keys:
+            raise ValueError("agents must name at least one agent")
+        return keys
 
 class RecoveryPlan(BaseModel):
     summary: str
-    agents: List[AgentResponse]
\ No newline at end of file
+    agents: List[AgentResponse]
+    session_id: Optional[str] = None
+
+# ?compact=true plans: no summary or roles, which are fixed per agent (see GET /agents)
+class CompactAgentResponse(BaseModel):
+    agent_name: str
+    advice: str
+
+class CompactRecoveryPlan(BaseModel):
+    agents: List[CompactAgentResponse]
+    session_id: Optional[str] = None
@@ -0,0 +1,132 @@
+import re
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Optional
+
+from .config import (
+    SESSION_MAX_SESSIONS, SESSION_TTL_SECONDS, SESSION_RECENT_TURNS, SESSION_SUMMARY_MAX_CHARS,
+    SESSION_TURN_MAX_CHARS, SESSION_COMPACT_TURN_CHARS,
+)
+from .metrics import Gauge, register
+
+# Earlier conversation for the plan being run (set by the orchestrator, read by call_groq_ai)
+conversation_context: ContextVar[Optional[str]] = ContextVar("conversation_context", default=None)
+
+# Ids are issued by POST /sessions (uuid4 hex); clients cannot pick their own
+SESSION_ID_PATTERN = r"^[0-9a-f]{32}$"
+
+
+def _clip(text: str, limit: int) -> str:
+    text = re.sub(r"\s+", " ", text).strip()
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def compact_turn(text: str, limit: int = SESSION_COMPACT_TURN_CHARS) -> str:
+    """Squeezes one message into a summary line: its first and last sentences, clipped."""
+    sentences = [s for s in re.split(r"(?<=[.!?])\s+", re.sub(r"\s+", " ", text).strip()) if s]
+    if len(sentences) > 2:
+        sentences = [sentences[0], sentences[-1]]
+    return _clip(" ... ".join(sentences), limit)
+
+
+class Session:
+    """One user's conversation: the last few messages verbatim plus a rolling summary of older ones."""
+
+    __slots__ = ("summary", "recent", "turns", "last_used")
+
+    def __init__(self):
+        self.summary = deque()  # one compacted line per older message, oldest first
+        self.recent = deque()
+        self.turns = 0
+        self.last_used = time.monotonic()
+
+    def add_turn(self, text: str):
+        self.recent.append(_clip(text, SESSION_TURN_MAX_CHARS))
+        self.turns += 1
+        while len(self.recent) > SESSION_RECENT_TURNS:
+            self.summary.append(compact_turn(self.recent.popleft()))
+        # Oldest lines fall off first once the summary is over its cap
+        while self.summary and sum(len(line) + 3 for line in self.summary) > SESSION_SUMMARY_MAX_CHARS:
+            self.summary.popleft()
+
+    def context(self) -> Optional[str]:
+        """What the agents see about earlier messages, or None for a fresh session."""
+        if not self.turns:
+            return None
+        parts = []
+        if self.summary:
+            parts.append("Summary of earlier messages:\n" + "\n".join(f"- {line}" for line in self.summary))
+        parts.append("Most recent messages:\n" + "\n".join(f"- {line}" for line in self.recent))
+        return "\n".join(parts)
+
+
+class SessionStore:
+    """In-process sessions with LRU eviction past `max_sessions` and an idle TTL.
+
+    Sessions are not shared between server worker processes: with several
+    workers (run.py --prod), a follow-up that lands on another worker starts
+    from an empty history. Run one worker, or route each session to one worker.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def create(self) -> str:
+        """Starts a session and returns its new, unguessable id."""
+        # Least recently used first, so idle sessions are swept from the front
+        while self._sessions and time.monotonic() - next(iter(self._sessions.values())).last_used > self.ttl_seconds:
+            self._sessions.popitem(last=False)
+            self.expired += 1
+        session_id = uuid.uuid4().hex
+        self._sessions[session_id] = Session()
+        self.created += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """The session, or None if it was never issued, has expired or was dropped."""
+        session = self._sessions.get(session_id)
+        if session is not None and time.monotonic() - session.last_used > self.ttl_seconds:
+            del self._sessions[session_id]
+            self.expired += 1
+            session = None
+        if session is None:
+            return None
+        self._sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def context(self, session_id: str) -> Optional[str]:
+        session = self.get(session_id)
+        return session.context() if session else None
+
+    def add_turn(self, session_id: str, text: str):
+        # A session that expired or was deleted while its plan ran is not brought back
+        session = self.get(session_id)
+        if session is not None:
+            session.add_turn(text)
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> dict:
+        return {"active": len(self._sessions), "created": self.created, "evicted": self.evicted,
+                "expired": self.expired}
+
+
+session_store = SessionStore(SESSION_MAX_SESSIONS, SESSION_TTL_SECONDS)
+
+register(Gauge(
+    "recovery_sessions", "Conversation sessions: active now, and created, evicted and expired so far.",
+    lambda: {(k,): v for k, v in session_store.stats().items()},
+    ["event"],
+))
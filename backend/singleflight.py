@@ -0,0 +1,68 @@
+import asyncio
+
+from .metrics import Counter, Gauge, register
+
+COALESCED = register(Counter(
+    "recovery_coalesced_calls_total", "Calls that joined an identical call already in flight.", ["scope"]))
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers with the same key share its result.
+
+    The shared call runs in its own task, so a caller that gives up (timeout,
+    disconnect) does not cancel it for the others. When the last caller
+    waiting on it gives up, the call is cancelled too.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self.leaders = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._waiters = {}  # task -> callers awaiting it
+
+    async def do(self, key, fn):
+        """Awaits fn() (a zero-argument coroutine function), or the identical call already running."""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            COALESCED.inc(scope=self.scope)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Nobody else wants the result: don't let it hold connections and rate-limit tokens
+            if self._waiters[task] == 1 and not task.done():
+                # Forget it first, so a caller arriving while it unwinds starts a fresh call
+                if self._in_flight.get(key) is task:
+                    del self._in_flight[key]
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _forget(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter gave up
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+
+plan_flights = SingleFlight("plan")
+llm_flights = SingleFlight("llm")
+
+register(Gauge(
+    "recovery_single_flight_in_flight", "Distinct calls currently in flight that others can join.",
+    lambda: {(flight.scope,): len(flight) for flight in (plan_flights, llm_flights)},
+    ["scope"],
+))
@@ -0,0 +1,60 @@
+"""Helpers shared by the benchmark scripts: start the stub LLM server and the API as subprocesses, summarize latencies."""
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(args, env):
+    """Starts `python -m uvicorn <args>` from the project root."""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", *args, "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+
+
+def start_stub(port, env):
+    return start_server(["stub_llm_server:app", "--app-dir", "benchmarks", "--port", str(port)], env)
+
+
+def start_api(port, env, target="backend.main:app", app_dir="."):
+    return start_server([target, "--app-dir", app_dir, "--port", str(port)], env)
+
+
+def wait_until_up(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def stop(servers):
+    for server in servers:
+        server.terminate()
+        server.wait()
+
+
+def api_env(stub_port, **overrides):
+    """Environment for an API process pointed at the stub, with no rate limiter or response cache."""
+    env = dict(os.environ)
+    env.update({
+        "GROQ_BASE_URL": f"http://127.0.0.1:{stub_port}",
+        "GROQ_API_KEY": "stub",
+        "LLM_RATE_LIMIT_RPM": "0",
+        "LLM_CACHE_BACKEND": "none",
+    })
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,105 @@
+"""Benchmark: throughput and latency of each LLM backend on this machine.
+
+Sends the four agent prompts with distinct user texts straight to each
+backend at a fixed concurrency and reports requests/s and latency
+percentiles. "groq" runs against the stub LLM server (so it measures the
+client stack plus STUB_LLM_DELAY, not the real API); "local" needs
+llama-cpp-python and a GGUF model:
+
+    python benchmarks/bench_backends.py --backends mock groq --requests 200 --concurrency 16
+    python benchmarks/bench_backends.py --backends local mock --model ~/models/qwen2.5-0.5b-instruct-q4_k_m.gguf
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STUB_PORT = 8105
+# The groq backend talks to the stub, with no rate limiter (the stub has no quota)
+os.environ.update({
+    "GROQ_BASE_URL": f"http://127.0.0.1:{STUB_PORT}",
+    "GROQ_API_KEY": "stub",
+    "LLM_RATE_LIMIT_RPM": "0",
+})
+
+from _servers import percentile, start_stub, stop, wait_until_up  # noqa: E402
+from backend import agents  # noqa: E402
+from backend.llm_backends import GroqBackend, LocalBackend, MockBackend  # noqa: E402
+from backend.registry import AGENT_REGISTRY  # noqa: E402
+
+
+def make_backend(name, args):
+    if name == "groq":
+        return GroqBackend(agents.get_llm_client, agents.GROQ_MODEL)
+    if name == "local":
+        return LocalBackend(model_path=args.model, batch_size=args.batch_size)
+    return MockBackend(delay=args.mock_delay)
+
+
+async def run_backend(backend, args):
+    specs = list(AGENT_REGISTRY.values())
+    limiter = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        spec = specs[i % len(specs)]
+        async with limiter:
+            start = time.perf_counter()
+            try:
+                text = await backend.complete(spec.system_prompt, f"Entry {i}: we broke up and I can't sleep",
+                                              spec.temperature, spec.max_tokens)
+            except Exception as e:
+                print(f"  {backend.name} call failed: {e}")
+                text = None
+            latencies.append(time.perf_counter() - start)
+            failures += not text
+
+    # One untimed call so model loading / connection setup is not measured
+    await one(-1)
+    latencies.clear()
+    failures = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    print(f"{backend.name:<6} {args.requests / elapsed:8.1f} req/s  "
+          f"p50={statistics.median(latencies) * 1000:7.1f}ms  p95={percentile(latencies, 95) * 1000:7.1f}ms  "
+          f"p99={percentile(latencies, 99) * 1000:7.1f}ms  failed={failures}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["mock", "groq"], choices=["groq", "local", "mock"])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--model", default=os.getenv("LLM_LOCAL_MODEL_PATH"), help="GGUF model for 'local'")
+    parser.add_argument("--batch-size", type=int, default=8, help="local backend batch size")
+    parser.add_argument("--mock-delay", type=float, default=0.0, help="simulated mock latency (s)")
+    args = parser.parse_args()
+
+    stub = None
+    if "groq" in args.backends:
+        stub = start_stub(STUB_PORT, dict(os.environ))
+        wait_until_up(f"http://127.0.0.1:{STUB_PORT}/stats")
+    print(f"\n{args.requests} requests per backend, {args.concurrency} at a time")
+    try:
+        for name in args.backends:
+            backend = make_backend(name, args)
+            if not backend.available():
+                print(f"{name:<6} unavailable (for 'local': pip install llama-cpp-python and pass --model)")
+                continue
+            await run_backend(backend, args)
+            await backend.aclose()
+    finally:
+        await agents.close_llm_client()
+        if stub is not None:
+            stop([stub])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""Benchmark: sequential vs concurrent agent fan-out against a mock LLM.
+
+Run from the project root:
+    python benchmarks/bench_fanout.py --runs 20 --delay 0.4 --jitter 0.3
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure the LLM path itself: no rate limiter (the mock has no quota) and no response cache
+os.environ.setdefault("LLM_RATE_LIMIT_RPM", "0")
+os.environ.setdefault("LLM_CACHE_BACKEND", "none")
+
+from backend import agents
+from backend.llm_client import LLMClient
+from backend.schemas import UserInput
+from _servers import percentile
+
+
+class MockCompletions:
+    """Stands in for AsyncGroq().chat.completions with an injected delay."""
+
+    def __init__(self, delay: float, jitter: float):
+        self.delay = delay
+        self.jitter = jitter
+
+    async def create(self, model, messages, temperature, max_tokens, **kwargs):
+        await asyncio.sleep(self.delay + random.uniform(0, self.jitter))
+        message = SimpleNamespace(content=f"mock reply ({max_tokens} tokens max)")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class MockLLM:
+    def __init__(self, delay: float, jitter: float):
+        self.chat = SimpleNamespace(completions=MockCompletions(delay, jitter))
+
+
+async def run_sequential(user_input: UserInput):
+    """The old orchestration: one agent after another."""
+    return [await agents.run_agent_live(spec, user_input.feelings_description)
+            for spec in agents.AGENT_REGISTRY.values()]
+
+
+async def measure(label, fn, user_input, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn(user_input)
+        timings.append(time.perf_counter() - start)
+    print(f"{label:<12} p50={statistics.median(timings) * 1000:7.1f}ms  "
+          f"p95={percentile(timings, 95) * 1000:7.1f}ms  max={max(timings) * 1000:7.1f}ms")
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.4, help="base mock LLM latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="extra random latency (s)")
+    args = parser.parse_args()
+
+    agents.set_llm_client(LLMClient(client=MockLLM(args.delay, args.jitter)))
+    user_input = UserInput(feelings_description="I just broke up and feel completely lost")
+
+    print(f"\nMock LLM latency: {args.delay:.2f}s + U(0, {args.jitter:.2f})s, {args.runs} runs each")
+    sequential = await measure("sequential", run_sequential, user_input, args.runs)
+    concurrent = await measure("concurrent", agents.run_multi_agent_stub, user_input, args.runs)
+    print(f"p50 speedup: {statistics.median(sequential) / statistics.median(concurrent):.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
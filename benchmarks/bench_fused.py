@@ -0,0 +1,75 @@
+"""Benchmark: four calls per plan (parallel) vs one combined call (fused).
+
+Runs the API against the stub LLM server in each ORCHESTRATION_MODE and
+reports LLM calls, tokens, latency and cost per plan:
+
+    python benchmarks/bench_fused.py --plans 20
+
+The fused prompt carries all four system prompts, so it only saves input
+tokens once the user text outweighs the per-call overhead; vary
+--entry-words to see where that happens. Token counts come from the stub (about 4 characters per token). Prices
+default to Groq's llama-3.1-8b-instant list price in USD per million tokens.
+"""
+import argparse
+import statistics
+import time
+
+import httpx
+
+from _servers import api_env, start_api, start_stub, stop, wait_until_up
+
+STUB_PORT = 8103
+API_PORT = 8104
+
+
+def run_mode(mode, args):
+    env = api_env(STUB_PORT, ORCHESTRATION_MODE=mode)
+    api = start_api(API_PORT, env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{API_PORT}/health")
+        stub = f"http://127.0.0.1:{STUB_PORT}"
+        httpx.post(f"{stub}/stats/reset")
+
+        latencies = []
+        for i in range(args.plans):
+            entry = " ".join(["we broke up last week and I keep checking my phone"] * max(1, args.entry_words // 11))
+            body = {"feelings_description": f"Entry {i}: {entry}"}
+            start = time.perf_counter()
+            httpx.post(f"http://127.0.0.1:{API_PORT}/run_agents", json=body, timeout=60).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+        stats = httpx.get(f"{stub}/stats").json()
+    finally:
+        stop([api])
+
+    tokens_in = stats["prompt_tokens"] / args.plans
+    tokens_out = stats["completion_tokens"] / args.plans
+    cost = (tokens_in * args.price_in + tokens_out * args.price_out) / 1_000_000
+    print(f"{mode:<9} calls/plan={stats['requests'] / args.plans:4.1f}  tokens in={tokens_in:6.0f} out={tokens_out:5.0f}  "
+          f"p50={statistics.median(latencies) * 1000:6.0f}ms  cost/plan=${cost:.6f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--entry-words", type=int, default=150, help="length of each feelings description")
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="stub time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="stub seconds per output token")
+    parser.add_argument("--price-in", type=float, default=0.05, help="USD per 1M input tokens")
+    parser.add_argument("--price-out", type=float, default=0.08, help="USD per 1M output tokens")
+    args = parser.parse_args()
+
+    stub_env = api_env(STUB_PORT, STUB_LLM_DELAY=args.llm_delay, STUB_LLM_JITTER=0.05,
+                       STUB_LLM_TOKEN_DELAY=args.token_delay, STUB_LLM_REPLY_FILL=0.8)
+    stub = start_stub(STUB_PORT, stub_env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{STUB_PORT}/stats")
+        print(f"\n{args.plans} plans per mode, stub: {args.llm_delay}s + {args.token_delay}s/token")
+        for mode in ("parallel", "fused"):
+            run_mode(mode, args)
+    finally:
+        stop([stub])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark: plan tail latency and LLM cost with hedging off vs on.
+
+Runs the API against the stub LLM server with a long-tailed (lognormal)
+latency distribution, once with LLM_HEDGE=off and once with it on, and
+reports plan latency percentiles next to the LLM calls and tokens the stub
+served (cancelled hedges included, as a provider would bill them):
+
+    python benchmarks/bench_hedging.py --plans 300 --sigma 0.8 --budget 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from _servers import api_env, percentile, start_api, start_stub, stop, wait_until_up
+
+STUB_PORT = 8106
+API_PORT = 8107
+
+
+async def fire(url, plans, concurrency):
+    limiter = asyncio.Semaphore(concurrency)
+    latencies = []
+    async with httpx.AsyncClient(timeout=120) as client:
+        async def one(i):
+            async with limiter:
+                start = time.perf_counter()
+                response = await client.post(url, json={"feelings_description": f"Hedge run {i}: I miss them"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(plans)))
+    return latencies
+
+
+def run_mode(hedge, args):
+    env = api_env(STUB_PORT, LLM_HEDGE=hedge, LLM_HEDGE_PERCENTILE=args.percentile,
+                  LLM_HEDGE_BUDGET_PERCENT=args.budget, LLM_HEDGE_MIN_SAMPLES=args.min_samples)
+    api = start_api(API_PORT, env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{API_PORT}/health")
+        url = f"http://127.0.0.1:{API_PORT}/run_agents"
+        # Fill the latency window first so hedging starts with a real percentile
+        asyncio.run(fire(url, args.warmup, args.concurrency))
+        stub = f"http://127.0.0.1:{STUB_PORT}"
+        httpx.post(f"{stub}/stats/reset")
+        latencies = asyncio.run(fire(url, args.plans, args.concurrency))
+        time.sleep(args.delay * 4)  # let cancelled hedges reach the stub's counters
+        served = httpx.get(f"{stub}/stats").json()
+        hedging = httpx.get(f"http://127.0.0.1:{API_PORT}/llm/stats").json().get("hedging", {})
+    finally:
+        stop([api])
+    return latencies, served, hedging
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.2, help="median stub LLM latency (s)")
+    parser.add_argument("--sigma", type=float, default=0.8, help="lognormal sigma; higher = longer tail")
+    parser.add_argument("--percentile", type=float, default=90)
+    parser.add_argument("--budget", type=float, default=10, help="max extra calls, percent of traffic")
+    parser.add_argument("--min-samples", type=int, default=20)
+    args = parser.parse_args()
+
+    stub = start_stub(STUB_PORT, dict(os.environ, STUB_LLM_DELAY=str(args.delay), STUB_LLM_JITTER=str(args.sigma),
+                                      STUB_LLM_DELAY_DIST="lognormal", STUB_LLM_CHUNK_DELAY="0"))
+    try:
+        wait_until_up(f"http://127.0.0.1:{STUB_PORT}/stats")
+        print(f"\nStub LLM latency: lognormal, median {args.delay}s, sigma {args.sigma}; "
+              f"{args.plans} plans, {args.concurrency} at a time")
+        baseline_calls = None
+        for hedge in ("off", "on"):
+            latencies, served, hedging = run_mode(hedge, args)
+            baseline_calls = baseline_calls or served["requests"]
+            extra = served["requests"] / baseline_calls - 1
+            print(f"hedge={hedge:<3}  p50={statistics.median(latencies) * 1000:7.0f}ms  "
+                  f"p95={percentile(latencies, 95) * 1000:7.0f}ms  p99={percentile(latencies, 99) * 1000:7.0f}ms  "
+                  f"max={max(latencies) * 1000:7.0f}ms  llm_calls={served['requests']} ({extra:+.1%})  "
+                  f"prompt_tokens={served['prompt_tokens']}")
+            if hedge == "on":
+                print(f"          hedges sent={hedging.get('hedges')}  won={hedging.get('hedge_wins')}  "
+                      f"delays={hedging.get('delays')}")
+    finally:
+        stop([stub])
+
+
+if __name__ == "__main__":
+    main()
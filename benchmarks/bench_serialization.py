@@ -0,0 +1,140 @@
+"""Benchmark: JSON serialization cost of /run_agents responses, per plan and per request.
+
+Part one times the serializers on a typical four-agent plan: FastAPI's
+default path for an untyped return (jsonable_encoder + json.dumps), pydantic's
+model_dump_json (what PlanResponse uses, full and compact) and orjson over
+model_dump.
+
+Part two drives the app in this process over ASGI (no sockets, so the
+serving stack is what gets measured) with the zero-latency mock backend
+and no response cache, comparing the previous handler (untyped dict body,
+UserInput(**body), default encoder) with /run_agents and /run_agents?compact=true:
+
+    python benchmarks/bench_serialization.py --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Pure serving overhead: instant deterministic LLM, nothing cached, nothing queued
+os.environ.update({
+    "GROQ_API_KEY": "",
+    "LLM_BACKENDS": "mock",
+    "LLM_MOCK_DELAY_SECONDS": "0",
+    "LLM_CACHE_BACKEND": "none",
+    "JOBS_BACKEND": "none",
+    "MAX_IN_FLIGHT_REQUESTS": "10000",
+})
+
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from backend.main import admit_request, app, read_cache_bypass  # noqa: E402
+from backend.registry import resolve_agents, plan_summary  # noqa: E402
+from backend.responses import dumps, render_plan  # noqa: E402
+from backend.schemas import AgentResponse, RecoveryPlan, UserInput  # noqa: E402
+from _servers import percentile  # noqa: E402
+
+
+# --- Part one: serializers ---
+def sample_plan():
+    specs = resolve_agents()
+    return RecoveryPlan(
+        summary=plan_summary(specs),
+        agents=[AgentResponse(agent_name=spec.agent_name, role=spec.role, advice=spec.fallback_responses[0])
+                for spec in specs],
+        session_id="0123456789abcdef",
+    )
+
+
+def bench_serializers(number):
+    plan = sample_plan()
+    serializers = {
+        "fastapi default": lambda: JSONResponse(jsonable_encoder(plan)).body,
+        "model_dump_json": lambda: render_plan(plan),
+        "model_dump_json compact": lambda: render_plan(plan, compact=True),
+        "orjson(model_dump)": lambda: dumps(plan.model_dump()),
+    }
+    print(f"\nSerializing one 4-agent plan, best of 5 x {number}")
+    for name, fn in serializers.items():
+        seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        print(f"  {name:<24} {seconds * 1e6:7.2f}us  {len(fn()):5d} bytes")
+
+
+# --- Part two: requests through the app ---
+async def legacy_run_agents(user_input: dict, _slot=Depends(admit_request), _cache=Depends(read_cache_bypass)):
+    """/run_agents as it was before typed bodies and PlanResponse."""
+    from backend.agents import run_multi_agent_stub
+    return await run_multi_agent_stub(UserInput(**user_input))
+
+
+app.add_api_route("/bench/legacy_run_agents", legacy_run_agents, methods=["POST"], response_class=JSONResponse)
+
+
+async def fire(client, path, requests, concurrency):
+    limiter = asyncio.Semaphore(concurrency)
+    latencies, sizes = [], []
+
+    async def one(i):
+        async with limiter:
+            start = time.perf_counter()
+            response = await client.post(path, json={"feelings_description": f"Serialization run {i}: I miss them"})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+            sizes.append(len(response.content))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, time.perf_counter() - start, statistics.fmean(sizes)
+
+
+async def bench_requests(args):
+    paths = {
+        "legacy (dict body)": "/bench/legacy_run_agents",
+        "/run_agents": "/run_agents",
+        "/run_agents compact": "/run_agents?compact=true",
+    }
+    transport = httpx.ASGITransport(app=app)
+    print(f"\n{args.requests} plans per route through the app, {args.concurrency} at a time (mock LLM)")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {}
+        for round_ in range(args.rounds):
+            for name, path in paths.items():
+                with contextlib.redirect_stdout(io.StringIO()):  # the orchestrator's progress prints
+                    results.setdefault(name, []).append(
+                        await fire(client, path, args.requests, args.concurrency))
+    baseline = None
+    for name, runs in results.items():
+        # Best round by throughput, to keep scheduler noise out of the comparison
+        latencies, elapsed, size = min(runs, key=lambda run: run[1])
+        per_request = elapsed / args.requests
+        baseline = baseline or per_request
+        print(f"  {name:<22} {args.requests / elapsed:8.1f} req/s  {per_request * 1e6:7.0f}us/req "
+              f"({per_request / baseline - 1:+6.1%})  p50={statistics.median(latencies) * 1000:6.2f}ms  "
+              f"p99={percentile(latencies, 99) * 1000:6.2f}ms  {size:6.0f} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="serializer calls per timing")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    bench_serializers(args.number)
+    asyncio.run(bench_requests(args))
+
+
+if __name__ == "__main__":
+    main()
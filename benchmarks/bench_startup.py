@@ -0,0 +1,79 @@
+"""Benchmark: cold-start cost of the backend.
+
+Measures, over several fresh processes:
+  - importing backend.agents and backend.main
+  - launching uvicorn until GET /health answers
+  - the first POST /run_agents after boot (against the stub LLM server)
+
+    python benchmarks/bench_startup.py --runs 5
+    WARMUP_PRIME=on python benchmarks/bench_startup.py --runs 5
+
+Boot includes the lifespan warmup (agents import, LLM client, and the
+priming request with WARMUP_PRIME=on); for where import time goes, see
+benchmarks/profile_imports.py.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from _servers import ROOT, api_env, start_api, start_stub, stop, wait_until_up
+
+STUB_PORT = 8108
+API_PORT = 8109
+
+
+def time_import(module, env):
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_boot(env):
+    start = time.perf_counter()
+    api = start_api(API_PORT, env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{API_PORT}/health", timeout=30)
+        boot = time.perf_counter() - start
+        start = time.perf_counter()
+        httpx.post(f"http://127.0.0.1:{API_PORT}/run_agents", timeout=30,
+                   json={"feelings_description": "first request after boot"}).raise_for_status()
+        first_request = time.perf_counter() - start
+    finally:
+        stop([api])
+    return boot, first_request
+
+
+def report(label, samples):
+    print(f"{label:<28} median={statistics.median(samples) * 1000:7.1f}ms  "
+          f"min={min(samples) * 1000:7.1f}ms  max={max(samples) * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = api_env(STUB_PORT, STUB_LLM_DELAY=0.05, STUB_LLM_JITTER=0)
+    stub = start_stub(STUB_PORT, env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{STUB_PORT}/stats")
+        imports_agents = [time_import("backend.agents", env) for _ in range(args.runs)]
+        imports_main = [time_import("backend.main", env) for _ in range(args.runs)]
+        boots, firsts = zip(*(time_boot(env) for _ in range(args.runs)))
+    finally:
+        stop([stub])
+
+    print(f"\n{args.runs} fresh processes each")
+    report("import backend.agents", imports_agents)
+    report("import backend.main", imports_main)
+    report("uvicorn boot to /health", boots)
+    report("first /run_agents (stub)", firsts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Exercise backend/llm_client.py against the stub LLM server with injected 429s and 5xx errors.
+
+    python benchmarks/llm_client_faults.py --calls 50 --rate-429 0.3 --rate-5xx 0.2
+
+Runs three scenarios and exits with status 1 if any expectation fails:
+a flaky provider (retries should absorb most errors), a provider that is
+down (the circuit breaker should open and short-circuit further calls), and
+a rate limit tighter than the callers' deadline (calls that would wait too
+long should fail at once and never reach the provider).
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+
+import httpx
+
+from _servers import ROOT, start_stub, stop, wait_until_up
+
+sys.path.insert(0, ROOT)
+STUB_PORT = 8102
+failed_checks = []
+
+
+def check(condition, message):
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        failed_checks.append(message)
+
+
+async def run_calls(calls, concurrent=False, deadline=None, rate_per_minute=None):
+    from backend.llm_backends import llm_deadline
+    from backend.llm_client import LLMClient, TokenBucket
+
+    client = LLMClient(api_key="stub")
+    if rate_per_minute is not None:
+        client.rate_limiter = TokenBucket(rate_per_minute, burst=2)
+    outcomes = {}
+
+    async def one():
+        if deadline is not None:
+            llm_deadline.set(time.monotonic() + deadline)
+        try:
+            await client.create(model="llama-3.1-8b-instant", max_tokens=20,
+                                messages=[{"role": "user", "content": "hello"}])
+            outcome = "ok"
+        except Exception as e:
+            outcome = type(e).__name__
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    if concurrent:
+        await asyncio.gather(*(one() for _ in range(calls)))
+    else:
+        for _ in range(calls):
+            await one()
+    await client.aclose()
+    return outcomes, client.stats()
+
+
+def scenario(label, calls, rate_429, rate_5xx, retry_after, **run_args):
+    env = dict(os.environ, STUB_LLM_DELAY="0.05", STUB_LLM_JITTER="0.02",
+               STUB_LLM_429_RATE=str(rate_429), STUB_LLM_5XX_RATE=str(rate_5xx),
+               STUB_LLM_RETRY_AFTER=str(retry_after))
+    server = start_stub(STUB_PORT, env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{STUB_PORT}/docs")
+        started = time.perf_counter()
+        outcomes, stats = asyncio.run(run_calls(calls, **run_args))
+        elapsed = time.perf_counter() - started
+        served = httpx.get(f"http://127.0.0.1:{STUB_PORT}/stats").json()
+    finally:
+        stop([server])
+    print(f"\n{label}: 429 rate={rate_429}, 5xx rate={rate_5xx}, {calls} calls in {elapsed:.2f}s")
+    print(f"  outcomes: {outcomes}")
+    print(f"  client:   {stats}")
+    return outcomes, stats, served, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--rate-429", type=float, default=0.3)
+    parser.add_argument("--rate-5xx", type=float, default=0.2)
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "GROQ_BASE_URL": f"http://127.0.0.1:{STUB_PORT}",
+        "LLM_RATE_LIMIT_RPM": "0",
+        "LLM_BACKOFF_BASE_SECONDS": "0.05",
+        "LLM_CIRCUIT_RESET_SECONDS": "60",
+    })
+    from backend.config import LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_MAX_RETRIES
+
+    outcomes, stats, _, _ = scenario("flaky provider", args.calls, args.rate_429, args.rate_5xx, args.retry_after)
+    # A call fails only if every attempt does; allow the expected failures plus three standard deviations
+    failure_odds = (args.rate_429 + args.rate_5xx) ** (LLM_MAX_RETRIES + 1)
+    allowed = args.calls * failure_odds + 3 * math.sqrt(args.calls * failure_odds * (1 - failure_odds))
+    check(outcomes.get("ok", 0) >= args.calls - allowed,
+          f"retries absorb most errors ({outcomes.get('ok', 0)}/{args.calls} ok)")
+    check(stats["retries"] > 0, "failed attempts were retried")
+
+    outcomes, stats, _, _ = scenario("provider down", args.calls, 0.0, 1.0, args.retry_after)
+    check("ok" not in outcomes, "no call succeeds while the provider is down")
+    check(outcomes.get("CircuitOpenError", 0) >= args.calls - LLM_CIRCUIT_FAILURE_THRESHOLD,
+          f"circuit opens after {LLM_CIRCUIT_FAILURE_THRESHOLD} failures and short-circuits the rest")
+
+    # 60 RPM with a burst of 2: two calls now, one after 1s; the rest would need 2s+ and give up at once
+    outcomes, stats, served, elapsed = scenario("rate limit below deadline", 6, 0.0, 0.0, args.retry_after,
+                                                concurrent=True, deadline=1.5, rate_per_minute=60)
+    check(outcomes.get("ok", 0) == 3 and outcomes.get("RateLimitWaitTooLong", 0) == 3,
+          "calls that would outlive their deadline fail fast")
+    check(served["requests"] == 3, f"only answered calls reach the provider ({served['requests']} requests)")
+    check(elapsed < 1.5, f"nobody waited past the deadline ({elapsed:.2f}s)")
+
+    print(f"\n{len(failed_checks)} failed check(s)")
+    sys.exit(1 if failed_checks else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Load test for POST /run_agents against the local stub LLM server.
+
+Starts benchmarks/stub_llm_server.py and the API (both via uvicorn), then
+fires requests at increasing concurrency and reports throughput:
+
+    python benchmarks/load_run_agents.py --concurrency 10 50 200 --requests 400
+
+--mode blocking serves the old handler shape (plain ``def`` endpoint, sync
+Groq client, agents one after another) against the same stub so the two can
+be compared on one machine.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from _servers import ROOT, api_env, start_api, start_stub, stop, wait_until_up
+
+STUB_PORT = 8100
+API_PORT = 8101
+
+
+async def run_level(url, concurrency, total):
+    statuses = {}
+    latencies = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(url, json={"feelings_description": "I just broke up and feel lost"})
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    print(f"concurrency={concurrency:<4} rps={total / elapsed:7.1f}  "
+          f"p50={statistics.median(latencies) * 1000:7.0f}ms  max={max(latencies) * 1000:7.0f}ms  "
+          f"statuses={statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["async", "blocking"], default="async")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--llm-delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    env = api_env(STUB_PORT, STUB_LLM_DELAY=args.llm_delay)
+    if args.mode == "async":
+        api = start_api(API_PORT, env)
+    else:
+        api = start_api(API_PORT, env, target="load_run_agents:blocking_app", app_dir="benchmarks")
+    servers = [start_stub(STUB_PORT, env), api]
+    try:
+        wait_until_up(f"http://127.0.0.1:{STUB_PORT}/docs")
+        wait_until_up(f"http://127.0.0.1:{API_PORT}/docs")
+        print(f"\nmode={args.mode}  stub LLM delay={args.llm_delay}s  requests/level={args.requests}")
+        for concurrency in args.concurrency:
+            asyncio.run(run_level(f"http://127.0.0.1:{API_PORT}/run_agents", concurrency, args.requests))
+    finally:
+        stop(servers)
+
+
+def _build_blocking_app():
+    """The pre-async request path, kept here only as a load-test baseline."""
+    sys.path.insert(0, ROOT)
+    from fastapi import FastAPI
+    from groq import Groq
+    from backend.registry import AGENT_REGISTRY
+
+    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    legacy = FastAPI()
+
+    @legacy.post("/run_agents")
+    def run_agents(user_input: dict):
+        advice = []
+        for spec in AGENT_REGISTRY.values():
+            response = client.chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[{"role": "system", "content": spec.system_prompt},
+                          {"role": "user", "content": user_input["feelings_description"]}],
+                temperature=spec.temperature, max_tokens=spec.max_tokens,
+            )
+            advice.append(response.choices[0].message.content)
+        return {"agents": advice}
+
+    return legacy
+
+
+if __name__ == "__main__":
+    main()
+else:
+    blocking_app = _build_blocking_app() if os.getenv("GROQ_BASE_URL") else None
@@ -0,0 +1,76 @@
+"""Import-time profile of the backend, from `python -X importtime` in fresh processes.
+
+Shows the total import time of each module and the imports that cost the
+most, both cumulative (with everything they pull in) and self (their own
+module body). Use it to check that cold start stays lean, e.g. that the
+Groq SDK is not imported until a client is built:
+
+    python benchmarks/profile_imports.py
+    python benchmarks/profile_imports.py --modules backend.agents --top 25 --env LLM_BACKENDS=mock
+    python benchmarks/profile_imports.py --budget-ms 800   # exit 1 if backend.main takes longer
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from _servers import ROOT
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(module, env):
+    """One fresh `import module`; returns [(name, depth, self_us, cumulative_us)] in import order."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, (len(indent) - 1) // 2, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(module, runs, top):
+    # Totals vary run to run; the breakdown comes from the median run
+    totals = [sum(row[3] for row in rows if row[1] == 0) for rows in runs]
+    rows = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    print(f"\n{module} (fresh process, site included): median {statistics.median(totals) / 1000:.1f}ms "
+          f"(min {min(totals) / 1000:.1f}ms, {len(rows)} modules imported)")
+    print(f"  {'cumulative':>10}  {'self':>8}  module")
+    for name, depth, self_us, cumulative_us in sorted(rows, key=lambda row: -row[3])[:top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {self_us / 1000:6.1f}ms  {'  ' * depth}{name}")
+    print("  top self time: " + ", ".join(
+        f"{name} {self_us / 1000:.1f}ms" for name, _, self_us, _ in sorted(rows, key=lambda row: -row[2])[:5]))
+    return statistics.median(totals) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=["backend.main", "backend.agents"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="extra environment variables")
+    parser.add_argument("--budget-ms", type=float, help="exit 1 if the first module's median import is slower")
+    args = parser.parse_args()
+
+    env = dict(os.environ, **dict(item.split("=", 1) for item in args.env))
+    totals = {}
+    for module in args.modules:
+        runs = [profile(module, env) for _ in range(args.runs)]
+        totals[module] = report(module, runs, args.top)
+        heavy = [name for name in ("groq", "llama_cpp") if any(row[0] == name for row in runs[0])]
+        if heavy:
+            print(f"  note: imports {', '.join(heavy)} at import time")
+
+    if args.budget_ms is not None:
+        first = totals[args.modules[0]]
+        print(f"\n{args.modules[0]}: {first:.1f}ms against a {args.budget_ms:.0f}ms budget")
+        sys.exit(1 if first > args.budget_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Local stand-in for the Groq chat completions API.
+
+Serves POST /openai/v1/chat/completions (the path the Groq SDK calls) after
+an artificial delay, so the backend can be load-tested without a real key:
+
+    STUB_LLM_DELAY=0.5 python -m uvicorn stub_llm_server:app --app-dir benchmarks --port 8100
+    GROQ_BASE_URL=http://127.0.0.1:8100 GROQ_API_KEY=stub python run.py
+
+STUB_LLM_DELAY_DIST shapes the delay: "uniform" (DELAY + U(0, JITTER)),
+"normal" (mean DELAY, std JITTER), "lognormal" (median DELAY, sigma JITTER,
+for a long tail), "exponential" (DELAY + Exp(mean JITTER)) or "fixed".
+STUB_LLM_429_RATE / STUB_LLM_5XX_RATE inject rate-limit and server errors.
+Requests with response_format json_object get a JSON object with the
+STUB_LLM_JSON_FIELDS keys. GET /stats reports requests and token counts
+(tokens approximated as 4 characters each); POST /stats/reset clears them.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STUB_LLM_DELAY = float(os.getenv("STUB_LLM_DELAY", "0.5"))
+STUB_LLM_JITTER = float(os.getenv("STUB_LLM_JITTER", "0.1"))
+STUB_LLM_DELAY_DIST = os.getenv("STUB_LLM_DELAY_DIST", "uniform").lower()
+# Delay between streamed chunks when the client asks for stream=True
+STUB_LLM_CHUNK_DELAY = float(os.getenv("STUB_LLM_CHUNK_DELAY", "0.02"))
+# Fraction of requests answered with 429 (+ Retry-After) or 500 instead of a completion
+STUB_LLM_429_RATE = float(os.getenv("STUB_LLM_429_RATE", "0"))
+STUB_LLM_5XX_RATE = float(os.getenv("STUB_LLM_5XX_RATE", "0"))
+STUB_LLM_RETRY_AFTER = os.getenv("STUB_LLM_RETRY_AFTER", "1")
+# Replies fill this fraction of max_tokens (0 = one short sentence), generated at
+# STUB_LLM_TOKEN_DELAY seconds per completion token
+STUB_LLM_REPLY_FILL = float(os.getenv("STUB_LLM_REPLY_FILL", "0"))
+STUB_LLM_TOKEN_DELAY = float(os.getenv("STUB_LLM_TOKEN_DELAY", "0"))
+STUB_LLM_JSON_FIELDS = os.getenv("STUB_LLM_JSON_FIELDS", "therapist,closure,routine,honesty").split(",")
+
+stats = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+app = FastAPI(title="Stub LLM server")
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(_latency())
+
+    roll = random.random()
+    if roll < STUB_LLM_429_RATE:
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429, headers={"Retry-After": STUB_LLM_RETRY_AFTER},
+        )
+    if roll < STUB_LLM_429_RATE + STUB_LLM_5XX_RATE:
+        return JSONResponse({"error": {"message": "Internal server error", "type": "internal_server_error"}},
+                            status_code=500)
+
+    prompt_tokens = sum(count_tokens(m["content"]) for m in body["messages"])
+    max_tokens = body.get("max_tokens") or 150
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        share = max_tokens // len(STUB_LLM_JSON_FIELDS)
+        content = json.dumps({field: _reply(prompt_tokens, share) for field in STUB_LLM_JSON_FIELDS})
+    else:
+        content = _reply(prompt_tokens, max_tokens)
+    completion_tokens = count_tokens(content)
+
+    stats["requests"] += 1
+    stats["prompt_tokens"] += prompt_tokens
+    stats["completion_tokens"] += completion_tokens
+
+    if body.get("stream"):
+        return StreamingResponse(_stream_chunks(body, content), media_type="text/event-stream")
+    await asyncio.sleep(STUB_LLM_TOKEN_DELAY * completion_tokens)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    for key in stats:
+        stats[key] = 0
+    return stats
+
+
+def _latency() -> float:
+    if STUB_LLM_DELAY_DIST == "fixed":
+        return STUB_LLM_DELAY
+    if STUB_LLM_DELAY_DIST == "normal":
+        return max(0.0, random.gauss(STUB_LLM_DELAY, STUB_LLM_JITTER))
+    if STUB_LLM_DELAY_DIST == "lognormal":
+        return random.lognormvariate(math.log(max(STUB_LLM_DELAY, 1e-6)), STUB_LLM_JITTER)
+    if STUB_LLM_DELAY_DIST == "exponential":
+        return STUB_LLM_DELAY + (random.expovariate(1 / STUB_LLM_JITTER) if STUB_LLM_JITTER > 0 else 0)
+    return STUB_LLM_DELAY + random.uniform(0, STUB_LLM_JITTER)
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _reply(prompt_tokens: int, max_tokens: int) -> str:
+    reply = f"Stub reply for a {prompt_tokens}-token prompt."
+    filler_tokens = int(max_tokens * STUB_LLM_REPLY_FILL) - count_tokens(reply)
+    if filler_tokens > 0:
+        reply += " lorem" * (filler_tokens * 4 // 6)
+    return reply
+
+
+async def _stream_chunks(body, content):
+    chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+    words = content.split(" ")
+    for i, word in enumerate(words):
+        chunk = {
+            "id": chunk_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "delta": {"content": word if i == 0 else " " + word},
+                "finish_reason": "stop" if i == len(words) - 1 else None,
+            }],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(STUB_LLM_CHUNK_DELAY + STUB_LLM_TOKEN_DELAY * count_tokens(chunk["choices"][0]["delta"]["content"]))
+    yield "data: [DONE]\n\n"
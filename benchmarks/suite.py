@@ -0,0 +1,246 @@
+"""Benchmark suite: micro-benchmarks and /run_agents load tests, saved for comparison across commits.
+
+Everything runs offline against benchmarks/stub_llm_server.py. Results go
+to benchmarks/results/<time>-<commit>.json; compare two runs to catch
+regressions (exit status 1 if any metric got worse by more than --threshold):
+
+    python benchmarks/suite.py run
+    python benchmarks/suite.py run --quick --stub-dist lognormal --stub-jitter 0.5
+    python benchmarks/suite.py compare benchmarks/results/A.json benchmarks/results/B.json
+
+Micro-benchmarks call call_groq_ai and run_multi_agent_stub in this process,
+once with the deterministic mock backend (pure orchestration overhead) and
+once through the Groq client against the stub. Load tests start the API as
+a subprocess and POST distinct texts to /run_agents at each concurrency
+level. The response cache and the rate limiter are off throughout.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _servers import ROOT, api_env, percentile, start_api, start_stub, stop, wait_until_up  # noqa: E402
+
+STUB_PORT = 8110
+API_PORT = 8111
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+# Lower is better for latencies, higher for throughput
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_KEYS = ("rps",)
+
+
+def summarize(latencies, elapsed, errors=0):
+    return {
+        "n": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    # "dirty" means the measured code (backend/) differs from the commit
+    return {"commit": git("rev-parse", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--", "backend"))}
+
+
+# --- Micro-benchmarks (in process) ---
+async def timed(fn, count, concurrency):
+    """Runs fn(i) for i in range(count), `concurrency` at a time; returns (latencies, elapsed, errors)."""
+    limiter = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with limiter:
+            start = time.perf_counter()
+            try:
+                if not await fn(i):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return latencies, time.perf_counter() - start, errors
+
+
+async def run_micro(args):
+    # The backend reads its settings at import, so point it at the stub first
+    os.environ.update(api_env(STUB_PORT))
+    from backend import agents
+    from backend.llm_backends import GroqBackend, MockBackend
+    from backend.registry import AGENT_REGISTRY
+    from backend.schemas import UserInput
+
+    spec = AGENT_REGISTRY["therapist"]
+
+    async def llm_call(i):
+        return await agents.call_groq_ai(spec.system_prompt, f"micro call {i}: I feel lost",
+                                         spec.temperature, spec.max_tokens)
+
+    async def plan(i):
+        return await agents.run_multi_agent_stub(UserInput(feelings_description=f"micro plan {i}: I feel lost"))
+
+    results = {}
+    backends = {
+        "mock": [MockBackend(delay=0)],
+        "stub": [GroqBackend(agents.get_llm_client, agents.GROQ_MODEL)],
+    }
+    for backend_name, backend in backends.items():
+        agents.set_llm_backends(backend)
+        count = args.micro_calls if backend_name == "mock" else args.micro_calls // 10 or 1
+        for name, fn in (("call_groq_ai", llm_call), ("run_multi_agent_stub", plan)):
+            with contextlib.redirect_stdout(io.StringIO()):  # the orchestrator's progress prints
+                await timed(fn, min(count, 5), 1)  # warm-up
+                latencies, elapsed, errors = await timed(fn, count, 1)
+            key = f"micro.{name}.{backend_name}"
+            results[key] = summarize(latencies, elapsed, errors)
+            print_row(key, results[key])
+    await agents.close_llm_client()
+    return results
+
+
+# --- Load tests (API subprocess) ---
+async def run_level(url, concurrency, total):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one(i):
+            response = await client.post(url, json={"feelings_description": f"Load test {i}: I just broke up"})
+            return response.status_code == 200
+
+        latencies, elapsed, errors = await timed(one, total, concurrency)
+    return summarize(latencies, elapsed, errors)
+
+
+def run_load(args):
+    api = start_api(API_PORT, api_env(STUB_PORT))
+    results = {}
+    try:
+        wait_until_up(f"http://127.0.0.1:{API_PORT}/health")
+        url = f"http://127.0.0.1:{API_PORT}/run_agents"
+        asyncio.run(run_level(url, 4, 8))  # warm-up
+        for concurrency in args.concurrency:
+            key = f"load.run_agents.c{concurrency}"
+            results[key] = asyncio.run(run_level(url, concurrency, max(args.requests, concurrency)))
+            print_row(key, results[key])
+    finally:
+        stop([api])
+    return results
+
+
+def print_row(key, row):
+    print(f"{key:<34} n={row['n']:<5} rps={row['rps']:9.1f}  p50={row['p50_ms']:9.2f}ms  "
+          f"p95={row['p95_ms']:9.2f}ms  p99={row['p99_ms']:9.2f}ms  errors={row['errors']}")
+
+
+def cmd_run(args):
+    if args.quick:
+        args.micro_calls, args.requests, args.concurrency = 200, 100, [10, 50]
+    stub_env = dict(os.environ, STUB_LLM_DELAY=str(args.stub_delay), STUB_LLM_JITTER=str(args.stub_jitter),
+                    STUB_LLM_DELAY_DIST=args.stub_dist, STUB_LLM_5XX_RATE=str(args.stub_error_rate))
+    stub = start_stub(STUB_PORT, stub_env)
+    results = {}
+    try:
+        wait_until_up(f"http://127.0.0.1:{STUB_PORT}/stats")
+        print(f"\nStub LLM: {args.stub_dist} delay={args.stub_delay}s jitter={args.stub_jitter}s "
+              f"5xx={args.stub_error_rate:.0%}")
+        if "micro" in args.only:
+            results.update(asyncio.run(run_micro(args)))
+        if "load" in args.only:
+            results.update(run_load(args))
+    finally:
+        stop([stub])
+
+    meta = {
+        **git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": {key: value for key, value in vars(args).items() if key != "func"},
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{datetime.now():%Y%m%d-%H%M%S}-{meta['commit'][:8]}.json")
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\nSaved {path}")
+
+
+def cmd_compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"base {base['meta']['commit'][:8]} ({base['meta']['timestamp']})  ->  "
+          f"new {new['meta']['commit'][:8]} ({new['meta']['timestamp']})")
+    regressions = 0
+    for key in sorted(set(base["results"]) & set(new["results"])):
+        cells = []
+        for metric in LATENCY_KEYS + THROUGHPUT_KEYS:
+            old, cur = base["results"][key][metric], new["results"][key][metric]
+            change = (cur - old) / old if old else 0.0
+            if metric in LATENCY_KEYS:
+                # Sub-millisecond wobble in the micro-benchmarks is noise, not a regression
+                worse = change > args.threshold and cur - old > args.min_delta_ms
+            else:
+                worse = change < -args.threshold
+            regressions += worse
+            cells.append(f"{metric}={cur:9.2f} ({change:+6.1%}){' !' if worse else '  '}")
+        print(f"{key:<34} " + "  ".join(cells))
+    for key in sorted(set(base["results"]) ^ set(new["results"])):
+        print(f"{key:<34} only in {'base' if key in base['results'] else 'new'}")
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and save results")
+    run.add_argument("--only", nargs="+", choices=["micro", "load"], default=["micro", "load"])
+    run.add_argument("--quick", action="store_true", help="fewer calls and concurrency levels")
+    run.add_argument("--micro-calls", type=int, default=1000, help="calls per mock micro-benchmark (stub: 1/10)")
+    run.add_argument("--requests", type=int, default=400, help="requests per load level")
+    run.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100, 200])
+    run.add_argument("--stub-delay", type=float, default=0.2)
+    run.add_argument("--stub-jitter", type=float, default=0.1)
+    run.add_argument("--stub-dist", default="lognormal",
+                     choices=["uniform", "normal", "lognormal", "exponential", "fixed"])
+    run.add_argument("--stub-error-rate", type=float, default=0.0, help="fraction of 500s from the stub")
+    run.add_argument("--out", default=RESULTS_DIR)
+    run.set_defaults(func=cmd_run)
+
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.10, help="relative change that counts (0.10 = 10%%)")
+    compare.add_argument("--min-delta-ms", type=float, default=0.5,
+                         help="latency changes smaller than this never count as regressions")
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
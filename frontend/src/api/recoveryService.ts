@@ -1,4 +1,4 @@
-import { RecoveryPlan, UserInput } from '../types';
+import { RecoveryPlan, RecoveryStreamHandlers, UserInput } from '../types';
 
 // Mock data for testing
 const mockRecoveryPlan: RecoveryPlan = {
@@ -48,4 +48,57 @@ export const getRecoveryPlan = async (userInput: UserInput): Promise<RecoveryPla
     // Return mock data if API fails
     return mockRecoveryPlan;
   }
-};
\ No newline at end of file
+};
+
+// Streams /run_agents/stream (Server-Sent Events) and calls the handlers as
+// each event arrives. EventSource can't POST, so the body is read manually.
+export const streamRecoveryPlan = async (
+  userInput: UserInput,
+  handlers: RecoveryStreamHandlers
+): Promise<void> => {
+  const response = await fetch('http://localhost:8000/run_agents/stream', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Accept': 'text/event-stream',
+    },
+    body: JSON.stringify(userInput),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  const dispatch = (rawEvent: string) => {
+    let eventName = 'message';
+    let data = '';
+    for (const line of rawEvent.split('\n')) {
+      if (line.startsWith('event:')) eventName = line.slice(6).trim();
+      else if (line.startsWith('data:')) data += line.slice(5).trim();
+    }
+    if (!data) return;
+
+    const payload = JSON.parse(data);
+    if (eventName === 'token') handlers.onToken?.(payload);
+    else if (eventName === 'agent') handlers.onAgent?.(payload);
+    else if (eventName === 'summary') handlers.onSummary?.(payload.summary);
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      dispatch(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+  if (buffer.trim()) dispatch(buffer);
+};
@@ -1,16 +1,33 @@
 import { useState } from 'react';
 import { Button } from '../components/ui/button';
 import { RecoveryPlan, UserInput, AgentResponse } from '../types';
-import { getRecoveryPlan } from '../api/recoveryService';
+import { getRecoveryPlan, streamRecoveryPlan } from '../api/recoveryService';
 import AgentCard from '../components/AgentCard';
 import { cn } from '../lib/utils';
 
+// Returns a copy of the plan with the agent at `index` replaced by update(current agent)
+const updateAgent = (
+    plan: RecoveryPlan | null,
+    index: number,
+    update: (agent: AgentResponse) => AgentResponse
+): RecoveryPlan => {
+    const current = plan ?? { summary: '', agents: [] };
+    const agents = [...current.agents];
+    for (let i = agents.length; i <= index; i++) {
+        agents[i] = { agent_name: '', role: '', advice: '' };
+    }
+    agents[index] = update(agents[index]);
+    return { ...current, agents };
+};
+
 const Recovery = () => {
     const [userFeeling, setUserFeeling] = useState('');
     const [recoveryPlan, setRecoveryPlan] = useState<RecoveryPlan | null>(null);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState('');
 
+    const hasAgents = !!recoveryPlan && recoveryPlan.agents.length > 0;
+
     const handleSubmit = async () => {
         if (isLoading || !userFeeling.trim()) return;
         
@@ -22,8 +39,22 @@ const Recovery = () => {
             const userInput: UserInput = { 
                 feelings_description: userFeeling 
             };
-            const plan = await getRecoveryPlan(userInput);
-            setRecoveryPlan(plan);
+            try {
+                await streamRecoveryPlan(userInput, {
+                    onToken: ({ index, agent_name, delta }) =>
+                        setRecoveryPlan(prev => updateAgent(prev, index, agent => ({
+                            ...agent, agent_name, advice: agent.advice + delta
+                        }))),
+                    onAgent: ({ index, agent_name, role, advice }) =>
+                        setRecoveryPlan(prev => updateAgent(prev, index, () => ({ agent_name, role, advice }))),
+                    onSummary: summary =>
+                        setRecoveryPlan(prev => ({ agents: prev?.agents ?? [], summary })),
+                });
+            } catch (streamErr) {
+                console.error('Streaming failed, falling back to /run_agents:', streamErr);
+                const plan = await getRecoveryPlan(userInput);
+                setRecoveryPlan(plan);
+            }
         } catch (err) {
             setError('Failed to fetch recovery plan. Please try again.');
             console.error('Error fetching recovery plan:', err);
@@ -87,8 +118,8 @@ const Recovery = () => {
                     )}
                 </div>
 
-                {/* Central Loading Spinner - Only shows when loading */}
-                {isLoading && (
+                {/* Central Loading Spinner - Only shows until the first agent starts streaming */}
+                {isLoading && !hasAgents && (
                     <div className="flex flex-col items-center justify-center py-16">
                         <div className="relative">
                             {/* Outer spinner */}
@@ -117,10 +148,11 @@ const Recovery = () => {
                     </div>
                 )}
 
-                {/* Results Section - Only shows when NOT loading and we have data */}
-                {!isLoading && recoveryPlan && (
+                {/* Results Section - Fills in as agents stream their answers */}
+                {hasAgents && recoveryPlan && (
                     <div className="space-y-8 px-2 animate-fade-in-up">
-                        {/* Summary Section */}
+                        {/* Summary Section - Arrives last */}
+                        {recoveryPlan.summary && (
                         <div className="bg-gradient-to-r from-blue-500 to-purple-600 text-white rounded-2xl p-6 lg:p-8 shadow-2xl max-w-6xl mx-auto">
                             <div className="flex items-center gap-3 lg:gap-4 mb-3 lg:mb-4">
                                 <div className="w-10 h-10 lg:w-12 lg:h-12 bg-white/20 rounded-full flex items-center justify-center flex-shrink-0">
@@ -132,6 +164,7 @@ const Recovery = () => {
                                 {recoveryPlan.summary}
                             </p>
                         </div>
+                        )}
 
                         {/* Agent Cards Section */}
                         <div className="text-center mb-6 lg:mb-8">
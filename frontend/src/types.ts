@@ -7,9 +7,28 @@ export interface AgentResponse {
 export interface RecoveryPlan {
   summary: string;
   agents: AgentResponse[];
+  session_id?: string | null;
 }
 
 export interface UserInput {
   feelings_description: string;
   image_base64?: string;
-}
\ No newline at end of file
+  agents?: string[];  // subset of 'therapist' | 'closure' | 'routine' | 'honesty'; all when omitted
+  session_id?: string;  // from POST /sessions; agents then remember earlier messages
+}
+
+export interface AgentStreamToken {
+  index: number;
+  agent_name: string;
+  delta: string;
+}
+
+export interface AgentStreamResult extends AgentResponse {
+  index: number;
+}
+
+export interface RecoveryStreamHandlers {
+  onToken?: (token: AgentStreamToken) => void;
+  onAgent?: (agent: AgentStreamResult) => void;
+  onSummary?: (summary: string) => void;
+}
@@ -1,21 +1,77 @@
+import argparse
 import sys
 import os
 
 # Add current directory to Python path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from backend.main import app
 import uvicorn
+from backend.config import (
+    HOST, PORT, WEB_CONCURRENCY, GRACEFUL_SHUTDOWN_SECONDS, LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_BURST, JOBS_BACKEND,
+)
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start the Breakup Recovery AI Agent API.")
+    parser.add_argument("--prod", action="store_true",
+                        help="production mode: multiple workers, no auto-reload")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY,
+                        help="worker processes in production mode (default: WEB_CONCURRENCY or CPU count)")
+    args = parser.parse_args()
+
     print("🚀 Starting Breakup Recovery AI Agent...")
-    print("📡 API available at: http://127.0.0.1:8000")
-    print("📚 Documentation at: http://127.0.0.1:8000/docs")
+    print(f"📡 API available at: http://{args.host}:{args.port}")
+    print(f"📚 Documentation at: http://{args.host}:{args.port}/docs")
     print("⚡ Press Ctrl+C to stop\n")
-    
-    uvicorn.run(
-        app,
-        host="127.0.0.1",
-        port=8000,
-        reload=True
-    )
\ No newline at end of file
+
+    if args.prod:
+        loop = "uvloop" if _installed("uvloop") else "asyncio"
+        http = "httptools" if _installed("httptools") else "h11"
+        print(f"🏭 Production mode: {args.workers} worker(s), loop={loop}, http={http}")
+        # Every worker has its own rate limiter, so each gets its share of the Groq quota
+        # (workers inherit this environment and read it when they import the config)
+        if LLM_RATE_LIMIT_RPM > 0 and args.workers > 1:
+            os.environ["LLM_RATE_LIMIT_RPM"] = str(LLM_RATE_LIMIT_RPM / args.workers)
+            os.environ["LLM_RATE_LIMIT_BURST"] = str(max(1, LLM_RATE_LIMIT_BURST // args.workers))
+            print(f"🚦 LLM rate limit split across workers: {LLM_RATE_LIMIT_RPM / args.workers:.1f} requests/min each")
+        if args.workers > 1:
+            print("⚠️ Conversation sessions live in each worker's memory: follow-ups that land on another "
+                  "worker lose their history. Use --workers 1 or sticky routing by session_id.")
+        # An in-memory job queue is per worker, so GET /jobs/{id} would 404 on the others
+        if JOBS_BACKEND == "memory" and args.workers > 1:
+            if "JOBS_BACKEND" in os.environ:
+                print("⚠️ JOBS_BACKEND=memory with several workers: jobs are only visible to the worker "
+                      "that queued them. Use JOBS_BACKEND=sqlite.")
+            else:
+                os.environ["JOBS_BACKEND"] = "sqlite"
+                print("🗃️ Job queue: sqlite, shared by all workers")
+        # Each worker is a fresh process that imports the app and creates its own
+        # LLM client; on shutdown workers drain in-flight requests and jobs first.
+        uvicorn.run(
+            "backend.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            loop=loop,
+            http=http,
+            proxy_headers=True,
+            timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+            log_level="warning",
+        )
+    else:
+        uvicorn.run(
+            "backend.main:app",
+            host=args.host,
+            port=args.port,
+            reload=True
+        )
@@ -1,8 +1,15 @@
 # test_groq_new_model.py
+# Checks which Groq models answer with your key. Reads GROQ_API_KEY from the
+# environment or .env (see backend/config.py); for offline performance
+# testing use benchmarks/suite.py instead.
+import sys
+
 from groq import Groq
 
-# Your API key
-API_KEY = "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"
+from backend.config import GROQ_API_KEY
+
+if not GROQ_API_KEY:
+    sys.exit("GROQ_API_KEY is not set (export it or add it to .env)")
 
 print("Testing different Groq models...\n")
 
@@ -17,7 +24,7 @@ for model in models_to_test:
     print(f"Testing model: {model}")
     
     try:
-        client = Groq(api_key=API_KEY)
+        client = Groq(api_key=GROQ_API_KEY)
         
         response = client.chat.completions.create(
             model=model,